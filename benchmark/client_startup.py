@@ -0,0 +1,58 @@
+# Measures the cli startup cost with `python -X importtime`, and checks that the client commands do not import the
+# service stack.
+# usage: python benchmark/client_startup.py (with fw-fanctrl installed, e.g. `pip install -e .`)
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = 20
+# what the cli does before sending a command to the service socket
+CLIENT_CODE = (
+    "from fw_fanctrl.__main__ import CommandParser, get_socket_controller;"
+    "args = CommandParser().parse_args(['print', 'speed']);"
+    "get_socket_controller(args.socket_controller)"
+)
+FORBIDDEN_MODULES = [
+    "jsonschema",
+    "fw_fanctrl.FanController",
+    "fw_fanctrl.Configuration",
+    "fw_fanctrl.hardwareController",
+]
+
+
+def import_times():
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CLIENT_CODE], stderr=subprocess.PIPE, text=True, check=True
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)", line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+def main():
+    times = import_times()
+    imported_forbidden = [m for m in times if any(m == f or m.startswith(f + ".") for f in FORBIDDEN_MODULES)]
+    print(f"fw_fanctrl.__main__ cumulative import time: {times.get('fw_fanctrl.__main__', 0) / 1000:.1f}ms")
+    print("slowest top-level imports:")
+    for module, cumulative in sorted(times.items(), key=lambda item: item[1], reverse=True)[:10]:
+        print(f"  {cumulative / 1000:>8.1f}ms  {module}")
+
+    durations = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", CLIENT_CODE], check=True)
+        durations.append(time.perf_counter() - start)
+    print(f"client startup (interpreter included), median of {RUNS}: {statistics.median(durations) * 1000:.1f}ms")
+
+    if imported_forbidden:
+        print(f"the client imports service modules: {', '.join(imported_forbidden)}", file=sys.stderr)
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
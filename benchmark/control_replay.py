@@ -0,0 +1,122 @@
+# Replays a temperature trace through the strategies of a configuration and a PID strategy, to tune and compare them.
+# usage: python benchmark/control_replay.py [TRACE] [--config CONFIG_PATH] [--pid-target 70] [--threshold 80] ...
+# (with fw-fanctrl installed, e.g. `pip install -e .`)
+#
+# The trace is either a CSV file with a "temperature" column (and optionally a "speed" column, the fan speed in use
+# when it was recorded, as exported by `fw-fanctrl export`), or a file with one temperature per line, sampled every
+# "--period" seconds. Without trace, the synthetic workload of `simulation.py` is used.
+#
+# As the fan speed changes the temperature, the trace is not replayed as is: the heat load is first recovered from it
+# with the thermal model of the simulated hardware controller, then each strategy drives the same model with its own
+# fan speeds, through the whole control loop (see `simulation.py`).
+import argparse
+import csv
+import json
+import os
+import tempfile
+
+from simulation import create_fan_controller, simulate, synthetic_workload
+
+from fw_fanctrl import INTERNAL_RESOURCES_PATH
+from fw_fanctrl.hardwareController.SimulatedHardwareController import SimulatedHardwareController
+
+
+def read_trace(path, default_speed):
+    with open(path, "r") as fp:
+        lines = fp.read().splitlines()
+    if "temperature" in lines[0].lower():
+        rows = list(csv.DictReader(lines))
+        column = "temperature" if "temperature" in rows[0] else "effectiveTemperature"
+        return [float(row[column]) for row in rows], [
+            float(row["speed"]) if row.get("speed") not in (None, "") else default_speed for row in rows
+        ]
+    temperatures = [float(line) for line in lines if line.strip() != ""]
+    return temperatures, [default_speed] * len(temperatures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="replay a temperature trace through fan control strategies")
+    parser.add_argument("trace", nargs="?", help="the temperature trace (default: a synthetic workload)")
+    parser.add_argument("--config", default=str(INTERNAL_RESOURCES_PATH.joinpath("config.json")))
+    parser.add_argument("--period", type=float, default=1, help="the trace sampling period (in seconds)")
+    parser.add_argument("--recorded-speed", type=float, default=30, help="the fan speed of traces without speed")
+    parser.add_argument("--threshold", type=float, default=80, help="the temperature not to exceed")
+    parser.add_argument("--ambient", type=float, default=25)
+    parser.add_argument("--heat-capacity", type=float, default=40, help="in J/°C")
+    parser.add_argument("--idle-conductance", type=float, default=0.4, help="in W/°C, fan stopped")
+    parser.add_argument("--fan-conductance", type=float, default=0.6, help="in W/°C, added at full fan speed")
+    parser.add_argument("--pid-target", type=float, default=70)
+    parser.add_argument("--pid-kp", type=float, default=5)
+    parser.add_argument("--pid-ki", type=float, default=0.1)
+    parser.add_argument("--pid-kd", type=float, default=0)
+    parser.add_argument("--pid-max-speed-change", type=float, default=5)
+    parser.add_argument("--async-writes", action="store_true", help="write the speeds through the speed writer")
+    parser.add_argument("--max-speed-ramp", type=float, help="the fan speed ramp limit (in percent per second)")
+    args = parser.parse_args()
+
+    def create_hardware_controller(workload):
+        return SimulatedHardwareController(
+            workload,
+            period=args.period,
+            ambient=args.ambient,
+            heat_capacity=args.heat_capacity,
+            idle_conductance=args.idle_conductance,
+            fan_conductance=args.fan_conductance,
+        )
+
+    if args.trace is not None:
+        temperatures, speeds = read_trace(args.trace, args.recorded_speed)
+        model = create_hardware_controller([0])
+        workload = [
+            model.get_load_from_temperatures(temperatures[i], temperatures[i + 1], speeds[i], args.period)
+            for i in range(len(temperatures) - 1)
+        ]
+    else:
+        workload = synthetic_workload(1155)
+
+    with open(args.config, "r") as fp:
+        config = json.load(fp)
+    config["strategies"]["pid-cli"] = {
+        "controlMode": "pid",
+        "pid": {
+            "targetTemperature": args.pid_target,
+            "proportionalGain": args.pid_kp,
+            "integralGain": args.pid_ki,
+            "derivativeGain": args.pid_kd,
+            "maxSpeedChange": args.pid_max_speed_change,
+        },
+        "fanSpeedUpdateFrequency": 5,
+        "movingAverageInterval": 5,
+    }
+
+    duration = len(workload) * args.period
+    print(f"{duration:.0f}s replayed, threshold {args.threshold}°C")
+    print(
+        f"{'strategy':<12} {'above threshold (s)':>20} {'fan changes':>12} {'writes':>10} {'max temp (°C)':>14} "
+        f"{'mean speed (%)':>15}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        config_path = os.path.join(directory, "config.json")
+        with open(config_path, "w") as fp:
+            json.dump(config, fp)
+        for strategy_name in config["strategies"]:
+            hardware_controller = create_hardware_controller(workload)
+            if args.trace is not None:
+                hardware_controller.temperature = temperatures[0]
+            fan_controller = create_fan_controller(
+                hardware_controller,
+                config_path,
+                strategy_name,
+                async_writes=args.async_writes,
+                max_speed_ramp=args.max_speed_ramp,
+            )
+            results = simulate(fan_controller, hardware_controller, duration, args.threshold)
+            fan_controller.close()
+            print(
+                f"{strategy_name:<12} {results['timeAboveThreshold']:>20.0f} {results['speedChanges']:>12} "
+                f"{results['hardwareWrites']:>10} {results['maxTemperature']:>14.1f} {results['meanSpeed']:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Drives the service with a simulated laptop, faster than real time, for every strategy of the bundled configuration.
+# usage: python benchmark/simulation.py [--duration 21600] [--threshold 80] (with fw-fanctrl installed, e.g. `pip install -e .`)
+#
+# The whole control loop runs (sampling, filters, strategy, write suppression...), on a simulated clock: each tick
+# jumps to the next scheduled deadline instead of sleeping. It reports the loop performance (ticks per second, CPU
+# time per tick, peak memory allocated, hardware writes) and the resulting thermal behavior of each strategy.
+# Each strategy also runs with a CPU load feed-forward ("<strategy>-ff"), the simulated CPU load following the heat load.
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from fw_fanctrl import INTERNAL_RESOURCES_PATH
+from fw_fanctrl.FanController import FanController
+from fw_fanctrl.hardwareController.SimulatedHardwareController import SimulatedHardwareController
+
+
+# (duration in seconds, heat load in watts): idle, short burst, idle, sustained load, idle
+WORKLOAD_PROFILE = [(120, 6), (45, 60), (90, 6), (600, 40), (300, 6)]
+
+
+def synthetic_workload(duration):
+    profile = [load for profile_duration, load in WORKLOAD_PROFILE for _ in range(profile_duration)]
+    return [profile[i % len(profile)] for i in range(int(duration))]
+
+
+# the "options" are passed to the controller as is, e.g. max_speed_ramp
+def create_fan_controller(hardware_controller, config_path, strategy_name, **options):
+    return FanController(
+        hardware_controller=hardware_controller,
+        socket_controller=None,
+        config_path=config_path,
+        strategy_name=strategy_name,
+        output_format=None,
+        clock=hardware_controller.get_time,
+        **options,
+    )
+
+
+# runs the control loop until "duration" simulated seconds, returns the loop and thermal metrics
+def simulate(fan_controller, hardware_controller, duration, threshold):
+    fan_controller.schedule_tasks(debug=False)
+    ticks = 0
+    time_above_threshold = 0
+    max_temperature = hardware_controller.temperature
+    speed_changes = 0
+    speed_integral = 0
+    last_time = hardware_controller.get_time()
+    last_speed = hardware_controller.speed
+    wall_started_at = time.perf_counter()
+    cpu_started_at = time.process_time()
+    while True:
+        deadline = fan_controller.scheduler.get_next_deadline()
+        if deadline is None or deadline > duration:
+            break
+        hardware_controller.advance(deadline)
+        fan_controller.tick(deadline)
+        ticks += 1
+        elapsed = deadline - last_time
+        if hardware_controller.temperature > threshold:
+            time_above_threshold += elapsed
+        max_temperature = max(max_temperature, hardware_controller.temperature)
+        speed_integral += last_speed * elapsed
+        if hardware_controller.speed != last_speed:
+            speed_changes += 1
+        last_time = deadline
+        last_speed = hardware_controller.speed
+    wall_time = time.perf_counter() - wall_started_at
+    cpu_time = time.process_time() - cpu_started_at
+    return {
+        "ticks": ticks,
+        "ticksPerSecond": ticks / wall_time if wall_time > 0 else 0,
+        "cpuPerTickUs": cpu_time / ticks * 1_000_000 if ticks > 0 else 0,
+        "hardwareWrites": hardware_controller.speed_writes,
+        "speedChanges": speed_changes,
+        "timeAboveThreshold": time_above_threshold,
+        "maxTemperature": max_temperature,
+        "meanSpeed": speed_integral / last_time if last_time > 0 else 0,
+    }
+
+
+def run_strategy(config_path, strategy_name, workload, duration, threshold, measure_memory=False):
+    hardware_controller = SimulatedHardwareController(workload)
+    if measure_memory:
+        tracemalloc.start()
+    fan_controller = create_fan_controller(hardware_controller, config_path, strategy_name)
+    results = simulate(fan_controller, hardware_controller, duration, threshold)
+    fan_controller.close()
+    if measure_memory:
+        results["peakMemoryKiB"] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="run the service on a simulated laptop, for every strategy")
+    parser.add_argument("--config", default=str(INTERNAL_RESOURCES_PATH.joinpath("config.json")))
+    parser.add_argument("--duration", type=float, default=21600, help="the simulated duration (in seconds)")
+    parser.add_argument("--threshold", type=float, default=80, help="the temperature not to exceed")
+    parser.add_argument(
+        "--feed-forward-speed", type=int, default=50, help="the feed-forward speed of the -ff strategies"
+    )
+    parser.add_argument(
+        "--load-threshold", type=float, default=50, help="the feed-forward load threshold of the -ff strategies"
+    )
+    args = parser.parse_args()
+
+    workload = synthetic_workload(args.duration)
+    with tempfile.TemporaryDirectory() as directory:
+        config_path = os.path.join(directory, "config.json")
+        with open(args.config, "r") as fp:
+            config = json.load(fp)
+        for strategy_name, strategy in list(config["strategies"].items()):
+            config["strategies"][f"{strategy_name}-ff"] = {
+                **strategy,
+                "feedForward": {
+                    "speed": args.feed_forward_speed,
+                    "loadThreshold": args.load_threshold,
+                    "sustainedFor": 2,
+                },
+            }
+        with open(config_path, "w") as fp:
+            json.dump(config, fp)
+        fan_controller = create_fan_controller(SimulatedHardwareController(workload), config_path, None)
+        strategies = list(fan_controller.configuration.get_strategies())
+        fan_controller.close()
+
+        print(f"{args.duration:.0f}s simulated per strategy, threshold {args.threshold}°C")
+        print(
+            f"{'strategy':<16} {'ticks/s':>9} {'CPU/tick (µs)':>14} {'memory (KiB)':>13} {'writes':>7} "
+            f"{'changes':>8} {'above (s)':>10} {'max (°C)':>9} {'mean speed (%)':>15}"
+        )
+        for strategy_name in strategies:
+            results = run_strategy(config_path, strategy_name, workload, args.duration, args.threshold)
+            # the allocation tracing slows everything down, so the memory is measured in a separate run
+            memory = run_strategy(config_path, strategy_name, workload, args.duration, args.threshold, True)
+            print(
+                f"{strategy_name:<16} {results['ticksPerSecond']:>9.0f} {results['cpuPerTickUs']:>14.1f} "
+                f"{memory['peakMemoryKiB']:>13.1f} {results['hardwareWrites']:>7} {results['speedChanges']:>8} "
+                f"{results['timeAboveThreshold']:>10.0f} {results['maxTemperature']:>9.1f} {results['meanSpeed']:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Measures the requests per second served by the socket controllers, with the command parser rebuilt for every
+# request (former behavior) and with the reused one.
+# usage: python benchmark/socket_requests.py (with fw-fanctrl installed, e.g. `pip install -e .`)
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fw_fanctrl.CommandParser import CommandParser
+from fw_fanctrl.dto.command_result.PrintFanSpeedCommandResult import PrintFanSpeedCommandResult
+from fw_fanctrl.socketController.AsyncUnixSocketController import AsyncUnixSocketController
+from fw_fanctrl.socketController.UnixSocketController import UnixSocketController
+
+REQUESTS = 2000
+CLIENTS = 8
+
+
+def rebuilding_parser(socket_controller_class):
+    class RebuildingParserSocketController(socket_controller_class):
+        def get_command_parser(self):
+            return CommandParser(True)
+
+    return RebuildingParserSocketController
+
+
+def measure(socket_controller_class, socket_path, clients):
+    server = socket_controller_class(socket_path)
+    t = threading.Thread(target=server.start_server_socket, args=[lambda args: PrintFanSpeedCommandResult("42")])
+    t.daemon = True
+    t.start()
+    client = socket_controller_class(socket_path)
+    while True:
+        try:
+            client.send_via_client_socket("print speed")
+            break
+        except OSError:
+            time.sleep(0.01)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        list(executor.map(lambda _: client.send_via_client_socket("print speed"), range(REQUESTS)))
+    elapsed = time.perf_counter() - start
+    server.stop_server_socket()
+    t.join()
+    return REQUESTS / elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'socket controller':<28} {'clients':>7} {'rebuilt parser (req/s)':>24} {'reused parser (req/s)':>23}")
+        for name, socket_controller_class in [
+            ("unix", UnixSocketController),
+            ("unix_async", AsyncUnixSocketController),
+        ]:
+            for clients in (1, CLIENTS):
+                if socket_controller_class is UnixSocketController and clients > 1:
+                    # serves a single client at a time
+                    continue
+                before = measure(
+                    rebuilding_parser(socket_controller_class),
+                    os.path.join(directory, f"{name}-{clients}-a.sock"),
+                    clients,
+                )
+                after = measure(socket_controller_class, os.path.join(directory, f"{name}-{clients}-b.sock"), clients)
+                print(f"{name:<28} {clients:>7} {before:>24.0f} {after:>23.0f}")
+
+
+if __name__ == "__main__":
+    main()
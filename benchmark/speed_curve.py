@@ -0,0 +1,53 @@
+# Compares the speed curve evaluation before and after its compilation in `Strategy`.
+# usage: python benchmark/speed_curve.py (with fw-fanctrl installed, e.g. `pip install -e .`)
+import json
+import timeit
+
+from fw_fanctrl import INTERNAL_RESOURCES_PATH
+from fw_fanctrl.Strategy import Strategy
+
+ITERATIONS = 100_000
+
+
+# the former evaluation path of `FanController.adapt_speed`, scanning the raw curve on every call
+def legacy_get_speed(speed_curve, current_temp):
+    min_point = speed_curve[0]
+    max_point = speed_curve[-1]
+    for e in speed_curve:
+        if current_temp > e["temp"]:
+            min_point = e
+        else:
+            max_point = e
+            break
+
+    if min_point == max_point:
+        return min_point["speed"]
+    slope = (max_point["speed"] - min_point["speed"]) / (max_point["temp"] - min_point["temp"])
+    return int(min_point["speed"] + (current_temp - min_point["temp"]) * slope)
+
+
+def main():
+    config = json.load(INTERNAL_RESOURCES_PATH.joinpath("config.json").open("r"))
+    temperatures = [t / 4 for t in range(0, 420)]
+    print(f"{'strategy':<12} {'legacy (ns/call)':>18} {'compiled (ns/call)':>20} {'speedup':>9}")
+    for name, parameters in config["strategies"].items():
+        strategy = Strategy(name, parameters)
+        for t in temperatures:
+            assert legacy_get_speed(strategy.speed_curve, t) == strategy.get_speed(t), (name, t)
+
+        def legacy():
+            for t in temperatures:
+                legacy_get_speed(strategy.speed_curve, t)
+
+        def compiled():
+            for t in temperatures:
+                strategy.get_speed(t)
+
+        number = ITERATIONS // len(temperatures)
+        legacy_ns = min(timeit.repeat(legacy, number=number, repeat=5)) / (number * len(temperatures)) * 1e9
+        compiled_ns = min(timeit.repeat(compiled, number=number, repeat=5)) / (number * len(temperatures)) * 1e9
+        print(f"{name:<12} {legacy_ns:>18.1f} {compiled_ns:>20.1f} {legacy_ns / compiled_ns:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Counts the fan speed writes left by the write suppression on temperatures hovering around the curve knots.
+# usage: python benchmark/write_suppression.py [--cycles 100] (with fw-fanctrl installed, e.g. `pip install -e .`)
+#
+# Each scenario alternates between two temperatures and replays them through `FanController.is_significant_change`,
+# as the control loop does for every speed update. The hunting between 0% and the lowest knot must be held back by
+# the falling hysteresis, while 100% is always reached.
+import argparse
+
+from fw_fanctrl.FanController import FanController
+from fw_fanctrl.Strategy import Strategy
+
+STRATEGY = {
+    "speedCurve": [
+        {"temp": 0, "speed": 0},
+        {"temp": 45, "speed": 0},
+        {"temp": 65, "speed": 25},
+        {"temp": 85, "speed": 100},
+    ],
+    "writeSuppression": {"deadband": 3, "risingHysteresis": 0, "fallingHysteresis": 3},
+}
+
+# (name, low temperature, high temperature, maximum number of writes)
+SCENARIOS = [
+    # 0% <-> 3%, the temperature only falls by 2.7°C, less than the falling hysteresis
+    ("stop knot", 44.9, 47.6, 1),
+    # 0% <-> 5%, the temperature falls by 4.5°C, the fan stops every time
+    ("stop knot, wide", 44.5, 49, None),
+    # 86% <-> 100%, the maximum speed is reached every time
+    ("max speed", 81.5, 85, None),
+]
+
+
+# returns the number of writes
+def replay(strategy, temperatures):
+    speed = 0
+    write_temperature = temperatures[0]
+    writes = 0
+    for temperature in temperatures:
+        new_speed = strategy.get_speed(temperature)
+        if FanController.is_significant_change(strategy, speed, new_speed, write_temperature, temperature):
+            speed = new_speed
+            write_temperature = temperature
+            writes += 1
+    return writes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="count the fan speed writes around the curve knots")
+    parser.add_argument("--cycles", type=int, default=100, help="the number of low/high temperature cycles")
+    args = parser.parse_args()
+
+    suppressed = Strategy("suppressed", STRATEGY)
+    unsuppressed = Strategy("unsuppressed", {"speedCurve": STRATEGY["speedCurve"]})
+    print(f"{'scenario':<16} {'writes':>8} {'without suppression':>20}")
+    for name, low, high, max_writes in SCENARIOS:
+        temperatures = [low, high] * args.cycles
+        writes = replay(suppressed, temperatures)
+        print(f"{name:<16} {writes:>8} {replay(unsuppressed, temperatures):>20}")
+        if max_writes is not None:
+            assert writes <= max_writes, (name, writes)
+        else:
+            # every cycle goes to the knot and back
+            assert writes >= 2 * args.cycles - 1, (name, writes)
+
+
+if __name__ == "__main__":
+    main()
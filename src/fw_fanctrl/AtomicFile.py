@@ -0,0 +1,26 @@
+import os
+import tempfile
+from os.path import isfile
+
+
+# the file is either fully replaced or left untouched, even if the system crashes while writing
+def write_atomically(path, content):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as fp:
+            if isfile(path):
+                os.fchmod(fp.fileno(), os.stat(path).st_mode & 0o7777)
+            fp.write(content)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+    # makes the rename itself durable
+    directory_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
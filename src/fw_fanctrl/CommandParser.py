@@ -1,12 +1,42 @@
 import argparse
+import contextvars
+import io
 import os
 import sys
 import textwrap
 
-from fw_fanctrl import DEFAULT_CONFIGURATION_FILE_PATH
+from fw_fanctrl import DEFAULT_CONFIGURATION_FILE_PATH, HISTORY_FILE_PATH, STATE_FILE_PATH
+from fw_fanctrl.TelemetrySubscription import TELEMETRY_FIELDS
 from fw_fanctrl.enum.OutputFormat import OutputFormat
 from fw_fanctrl.exception.UnknownCommandException import UnknownCommandException
 
+COMMANDS = ["run", "use", "reload", "reset", "pause", "resume", "print", "watch", "export", "set_config"]
+
+# where the parsers output (help, usage, errors and warnings) goes, None for the process standard streams.
+# being a context variable, concurrent parsings (threads or asyncio tasks) each have their own.
+output_capture = contextvars.ContextVar("output_capture", default=None)
+
+
+def print_message(message, file=None):
+    capture = output_capture.get()
+    if capture is not None:
+        capture.write(message)
+    elif message:
+        (file or sys.stdout).write(message)
+
+
+def telemetry_fields(value):
+    fields = [field.strip() for field in value.split(",") if field.strip() != ""]
+    for field in fields:
+        if field not in TELEMETRY_FIELDS:
+            raise argparse.ArgumentTypeError(f"unknown field '{field}', choose from {', '.join(TELEMETRY_FIELDS)}")
+    return fields
+
+
+class CapturingArgumentParser(argparse.ArgumentParser):
+    def _print_message(self, message, file=None):
+        print_message(message, file)
+
 
 class CommandParser:
     is_remote = True
@@ -17,10 +47,19 @@ class CommandParser:
     def __init__(self, is_remote=False):
         self.is_remote = is_remote
         self.init_parser()
-        self.init_legacy_parser()
+
+    # the legacy parser is only built when the arguments may be a legacy command
+    def get_legacy_parser(self):
+        if self.legacy_parser is None:
+            self.init_legacy_parser()
+        return self.legacy_parser
+
+    @staticmethod
+    def may_be_legacy_command(args):
+        return not any(arg in COMMANDS for arg in (sys.argv[1:] if args is None else args))
 
     def init_parser(self):
-        self.parser = argparse.ArgumentParser(
+        self.parser = CapturingArgumentParser(
             prog="fw-fanctrl",
             description="control Framework's laptop fan(s) with a speed curve",
             epilog=textwrap.dedent(
@@ -33,7 +72,7 @@ class CommandParser:
             "--sc",
             help="the socket controller to use for communication between the cli and the service",
             type=str,
-            choices=["unix"],
+            choices=["unix", "unix_async"],
             default="unix",
         )
         self.parser.add_argument(
@@ -76,9 +115,104 @@ class CommandParser:
                 "--hc",
                 help="the hardware controller to use for fetching and setting the temp and fan(s) speed",
                 type=str,
-                choices=["framework_tool"],
+                choices=["framework_tool", "framework_tool_persistent", "sysfs"],
                 default="framework_tool",
             )
+            run_command.add_argument(
+                "--min-sampling-interval",
+                help="the shortest interval (in seconds) between two temperature samples, used while it rises quickly",
+                type=float,
+                default=1,
+            )
+            run_command.add_argument(
+                "--max-sampling-interval",
+                help="the longest interval (in seconds) between two temperature samples, used while it is stable",
+                type=float,
+                default=1,
+            )
+            run_command.add_argument(
+                "--watch-config",
+                help="automatically reload the configuration file when it changes",
+                action="store_true",
+            )
+            run_command.add_argument(
+                "--history-file",
+                help=f"record the service status every temperature sample into this ring file, e.g. {HISTORY_FILE_PATH}",
+                type=str,
+                default=None,
+            )
+            run_command.add_argument(
+                "--history-size",
+                help="the number of records kept in the history file, the oldest ones being overwritten (default: 86400)",
+                type=int,
+                default=86400,
+            )
+            run_command.add_argument(
+                "--metrics-address",
+                help="serve the metrics in the Prometheus text format over HTTP, on HOST:PORT (e.g. 127.0.0.1:9101) "
+                "or on a unix socket path",
+                type=str,
+                default=None,
+            )
+            run_command.add_argument(
+                "--stats",
+                help="time the service stages (temperature reads, speed updates, socket commands...), see `print stats`",
+                action="store_true",
+            )
+            run_command.add_argument(
+                "--stats-interval",
+                help="print the stage timings every STATS_INTERVAL seconds (implies --stats)",
+                type=float,
+                default=None,
+            )
+            run_command.add_argument(
+                "--async-writes",
+                help="write the fan speeds from a dedicated thread, so that a slow EC never delays the temperature sampling",
+                action="store_true",
+            )
+            run_command.add_argument(
+                "--max-speed-ramp",
+                help="the maximum fan speed change (in percent per second) applied by the writer (implies --async-writes)",
+                type=float,
+                default=None,
+            )
+            run_command.add_argument(
+                "--state-file",
+                help="keep the recent temperatures, the strategy in use and the fan speed in this file, to resume from "
+                f"them after a restart (default: {STATE_FILE_PATH}, an empty value disables it)",
+                type=str,
+                default=STATE_FILE_PATH,
+            )
+            run_command.add_argument(
+                "--state-max-age",
+                help="the maximum age (in seconds) of a state file to resume from (default: 120)",
+                type=float,
+                default=120,
+            )
+            run_command.add_argument(
+                "--power-state-ttl",
+                help="maximum age (in seconds) of the cached AC state, power supply events refresh it immediately",
+                type=float,
+                default=30,
+            )
+
+        if not self.is_remote:
+            export_command = commands_sub_parser.add_parser(
+                "export",
+                description="print the recorded history (as CSV, or NDJSON with the JSON output format)",
+            )
+            export_command.add_argument(
+                "--history-file",
+                help=f"the history file path (default: {HISTORY_FILE_PATH})",
+                type=str,
+                default=HISTORY_FILE_PATH,
+            )
+            export_command.add_argument(
+                "--since",
+                help="only export the records of the last SINCE seconds (default: all)",
+                type=float,
+                default=None,
+            )
 
         use_command = commands_sub_parser.add_parser("use", description="change the current strategy")
         use_command.add_argument(
@@ -98,13 +232,29 @@ class CommandParser:
         )
         print_command.add_argument(
             "print_selection",
-            help=f"all - All details{os.linesep}current - The current strategy{os.linesep}list - List available strategies{os.linesep}speed - The current fan speed percentage{os.linesep}active - The service activity status",
+            help=f"all - All details{os.linesep}current - The current strategy{os.linesep}list - List available strategies{os.linesep}speed - The current fan speed percentage{os.linesep}active - The service activity status{os.linesep}sensors - The temperature of every sensor{os.linesep}stats - The timings of the service stages",
             nargs="?",
             type=str,
-            choices=["all", "active", "current", "list", "speed"],
+            choices=["all", "active", "current", "list", "speed", "sensors", "stats"],
             default="all",
         )
 
+        watch_command = commands_sub_parser.add_parser(
+            "watch", description="stream the service status on every temperature sample, until interrupted"
+        )
+        watch_command.add_argument(
+            "--fields",
+            help=f"comma-separated list of the fields to send, among: {', '.join(TELEMETRY_FIELDS)} (default: all)",
+            type=telemetry_fields,
+            default=None,
+        )
+        watch_command.add_argument(
+            "--interval",
+            help="minimum interval (in seconds) between two records (default: every temperature sample)",
+            type=float,
+            default=0,
+        )
+
         set_config_command = commands_sub_parser.add_parser(
             "set_config", description="replace the service configuration with the provided one"
         )
@@ -115,20 +265,11 @@ class CommandParser:
         )
 
     def init_legacy_parser(self):
-        self.legacy_parser = argparse.ArgumentParser(add_help=False)
+        self.legacy_parser = CapturingArgumentParser(add_help=False)
 
         # avoid collision with the new parser commands
         def excluded_positional_arguments(value):
-            if value in [
-                "run",
-                "use",
-                "reload",
-                "reset",
-                "pause",
-                "resume",
-                "print",
-                "set_config",
-            ]:
+            if value in COMMANDS:
                 raise argparse.ArgumentTypeError("%s is an excluded value" % value)
             return value
 
@@ -161,49 +302,60 @@ class CommandParser:
             default="unix",
         )
 
-    def parse_args(self, args=None):
-        original_stderr = sys.stderr
-        # silencing legacy parser output
-        sys.stderr = open(os.devnull, "w")
+    # "output" receives the parsers output instead of the process standard streams, when provided
+    def parse_args(self, args=None, output=None):
+        token = output_capture.set(output)
+        try:
+            try:
+                if not self.may_be_legacy_command(args):
+                    raise UnknownCommandException("not a legacy command")
+                # silencing legacy parser output
+                legacy_values = self.parse_silently(self.get_legacy_parser(), args)
+                if legacy_values.strategy is None:
+                    legacy_values.strategy = legacy_values._strategy
+                # converting legacy values into new ones
+                values = argparse.Namespace()
+                values.socket_controller = legacy_values.socket_controller
+                values.output_format = OutputFormat.NATURAL
+                if legacy_values.query:
+                    values.command = "print"
+                    values.print_selection = "current"
+                if legacy_values.list_strategies:
+                    values.command = "print"
+                    values.print_selection = "list"
+                if legacy_values.resume:
+                    values.command = "resume"
+                if legacy_values.pause:
+                    values.command = "pause"
+                if legacy_values.reload:
+                    values.command = "reload"
+                if legacy_values.run:
+                    values.command = "run"
+                    values.silent = legacy_values.no_log
+                    values.hardware_controller = legacy_values.hardware_controller
+                    values.config = legacy_values.config
+                    values.strategy = legacy_values.strategy
+                if not hasattr(values, "command") and legacy_values.strategy is not None:
+                    values.command = "use"
+                    values.strategy = legacy_values.strategy
+                if not hasattr(values, "command"):
+                    raise UnknownCommandException("not a valid legacy command")
+                if self.is_remote or values.command == "run":
+                    # Legacy commands do not support other formats than NATURAL, so there is no need to use a CommandResult.
+                    print_message(
+                        "[Warning] > this command is deprecated and will be removed soon, please use the new command format instead ('fw-fanctrl -h' for more details)."
+                        + os.linesep
+                    )
+            except (SystemExit, Exception):
+                values = self.parser.parse_args(args)
+            return values
+        finally:
+            output_capture.reset(token)
+
+    @staticmethod
+    def parse_silently(parser, args):
+        token = output_capture.set(io.StringIO())
         try:
-            legacy_values = self.legacy_parser.parse_args(args)
-            if legacy_values.strategy is None:
-                legacy_values.strategy = legacy_values._strategy
-            # converting legacy values into new ones
-            values = argparse.Namespace()
-            values.socket_controller = legacy_values.socket_controller
-            values.output_format = OutputFormat.NATURAL
-            if legacy_values.query:
-                values.command = "print"
-                values.print_selection = "current"
-            if legacy_values.list_strategies:
-                values.command = "print"
-                values.print_selection = "list"
-            if legacy_values.resume:
-                values.command = "resume"
-            if legacy_values.pause:
-                values.command = "pause"
-            if legacy_values.reload:
-                values.command = "reload"
-            if legacy_values.run:
-                values.command = "run"
-                values.silent = legacy_values.no_log
-                values.hardware_controller = legacy_values.hardware_controller
-                values.config = legacy_values.config
-                values.strategy = legacy_values.strategy
-            if not hasattr(values, "command") and legacy_values.strategy is not None:
-                values.command = "use"
-                values.strategy = legacy_values.strategy
-            if not hasattr(values, "command"):
-                raise UnknownCommandException("not a valid legacy command")
-            if self.is_remote or values.command == "run":
-                # Legacy commands do not support other formats than NATURAL, so there is no need to use a CommandResult.
-                print(
-                    "[Warning] > this command is deprecated and will be removed soon, please use the new command format instead ('fw-fanctrl -h' for more details)."
-                )
-        except (SystemExit, Exception):
-            sys.stderr = original_stderr
-            values = self.parser.parse_args(args)
+            return parser.parse_args(args)
         finally:
-            sys.stderr = original_stderr
-        return values
+            output_capture.reset(token)
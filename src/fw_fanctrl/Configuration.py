@@ -1,4 +1,8 @@
+import functools
+import hashlib
 import json
+import sys
+import threading
 from json import JSONDecodeError
 from os.path import isfile
 from shutil import copyfile
@@ -6,7 +10,8 @@ from shutil import copyfile
 import jsonschema
 
 from fw_fanctrl import INTERNAL_RESOURCES_PATH
-from fw_fanctrl.Strategy import Strategy
+from fw_fanctrl.AtomicFile import write_atomically
+from fw_fanctrl.ConfigurationSnapshot import ConfigurationSnapshot
 from fw_fanctrl.exception.ConfigurationParsingException import ConfigurationParsingException
 from fw_fanctrl.exception.InvalidStrategyException import InvalidStrategyException
 
@@ -14,21 +19,53 @@ VALIDATION_SCHEMA_PATH = INTERNAL_RESOURCES_PATH.joinpath("config.schema.json")
 ORIGINAL_CONFIG_PATH = INTERNAL_RESOURCES_PATH.joinpath("config.json")
 
 
+# the schema is compiled once per process
+@functools.cache
+def get_validator():
+    with VALIDATION_SCHEMA_PATH.open("r") as fp:
+        return jsonschema.Draft202012Validator(json.load(fp))
+
+
+@functools.cache
+def get_original_schema_reference():
+    with ORIGINAL_CONFIG_PATH.open("r") as fp:
+        return json.load(fp)["$schema"]
+
+
 class Configuration:
     path = None
-    data = None
+    snapshot = None
+    # digest of the configuration file content last loaded or saved
+    fingerprint = None
+    # delay (in seconds) during which the saves are coalesced into a single write
+    save_delay = 1
+    save_timer = None
+    # whether the configuration holds changes not written yet, kept after a failed write so that it is retried
+    dirty = False
+    # the error of the last deferred write, None once a write succeeds
+    save_error = None
 
-    def __init__(self, path):
+    def __init__(self, path, save_delay=1):
         self.path = path
+        self.save_delay = save_delay
+        # serializes the reloads and saves, the readers only ever use the current snapshot
+        self.lock = threading.RLock()
         self.reload()
 
+    @property
+    def data(self):
+        return self.snapshot.data
+
+    @property
+    def strategies(self):
+        return self.snapshot.strategies
+
     def parse(self, raw_config):
         try:
             config = json.loads(raw_config)
             if "$schema" not in config:
-                original_config = json.load(ORIGINAL_CONFIG_PATH.open("r"))
-                config["$schema"] = original_config["$schema"]
-            jsonschema.Draft202012Validator(json.load(VALIDATION_SCHEMA_PATH.open("r"))).validate(config)
+                config["$schema"] = get_original_schema_reference()
+            get_validator().validate(config)
             if config["defaultStrategy"] not in config["strategies"]:
                 raise ConfigurationParsingException(
                     f"Default strategy '{config["defaultStrategy"]}' is not a valid strategy."
@@ -41,31 +78,97 @@ class Configuration:
         except JSONDecodeError as e:
             raise ConfigurationParsingException(f"Error parsing configuration file: {e}")
 
+    @staticmethod
+    def get_fingerprint(raw_config):
+        return hashlib.sha256(raw_config.encode("utf-8")).digest()
+
+    # returns whether the configuration changed, an unchanged file is neither parsed nor validated again
     def reload(self):
-        if not isfile(self.path):
-            copyfile(ORIGINAL_CONFIG_PATH, self.path)
-        with open(self.path, "r") as fp:
-            raw_config = fp.read()
-        self.data = self.parse(raw_config)
+        with self.lock:
+            # a configuration not saved yet must not be replaced by the older one on disk, a failed write raises again
+            self.flush()
+            if not isfile(self.path):
+                copyfile(ORIGINAL_CONFIG_PATH, self.path)
+            raw_config = self.read_file()
+            fingerprint = self.get_fingerprint(raw_config)
+            if fingerprint == self.fingerprint:
+                return False
+            self.set_data(self.parse(raw_config))
+            self.fingerprint = fingerprint
+            return True
 
+    def set_data(self, data):
+        # the strategies are built once per configuration change, as they are requested several times per tick
+        self.snapshot = ConfigurationSnapshot(data)
+
+    def to_dict(self):
+        return {"path": self.path, "data": self.snapshot.data}
+
+    # the first save of a burst is written immediately (its error reaching the caller), the following ones are
+    # coalesced into a single write "save_delay" seconds later, use flush to write immediately
     def save(self):
-        string_config = json.dumps(self.data, indent=4)
-        with open(self.path, "w") as fp:
-            fp.write(string_config)
+        with self.lock:
+            self.dirty = True
+            if self.save_timer is not None:
+                return
+            self.write()
+            if self.save_delay > 0:
+                self.save_timer = threading.Timer(self.save_delay, self.flush_deferred)
+                self.save_timer.daemon = True
+                self.save_timer.start()
+
+    def flush(self):
+        with self.lock:
+            if self.save_timer is not None:
+                self.save_timer.cancel()
+                self.save_timer = None
+            if self.dirty:
+                self.write()
+
+    # nobody is waiting for the deferred write, its error is kept for the status instead
+    def flush_deferred(self):
+        with self.lock:
+            # flushed (and maybe followed by another burst) in the meantime
+            if self.save_timer is not threading.current_thread():
+                return
+            self.save_timer = None
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"[Error] > could not save the configuration to '{self.path}': {e}", file=sys.stderr)
+
+    def write(self):
+        string_config = json.dumps(self.snapshot.data, indent=4)
+        try:
+            # spares the storage a write of what it already holds
+            if not isfile(self.path) or self.read_file() != string_config:
+                write_atomically(self.path, string_config)
+        except OSError as e:
+            self.save_error = str(e)
+            raise
+        self.fingerprint = self.get_fingerprint(string_config)
+        self.dirty = False
+        self.save_error = None
+
+    def read_file(self):
+        with open(self.path, "r") as fp:
+            return fp.read()
 
     def get_strategies(self):
-        return self.data["strategies"].keys()
+        return self.snapshot.strategies.keys()
 
     def get_strategy(self, strategy_name):
+        # a single snapshot is used, in case another one is swapped in meanwhile
+        snapshot = self.snapshot
         if strategy_name == "strategyOnDischarging":
-            strategy_name = self.data[strategy_name]
+            strategy_name = snapshot.data[strategy_name]
             if strategy_name == "":
                 strategy_name = "defaultStrategy"
         if strategy_name == "defaultStrategy":
-            strategy_name = self.data[strategy_name]
-        if strategy_name is None or strategy_name not in self.data["strategies"]:
+            strategy_name = snapshot.data[strategy_name]
+        if strategy_name is None or strategy_name not in snapshot.strategies:
             raise InvalidStrategyException(strategy_name)
-        return Strategy(strategy_name, self.data["strategies"][strategy_name])
+        return snapshot.strategies[strategy_name]
 
     def get_default_strategy(self):
         return self.get_strategy("defaultStrategy")
@@ -0,0 +1,17 @@
+from types import MappingProxyType
+
+from fw_fanctrl.Strategy import Strategy
+
+
+# a fully built configuration, never modified once created: a new snapshot replaces it on every change, with a single
+# reference assignment, so that the control loop always sees a consistent data/strategies pair without locking
+class ConfigurationSnapshot:
+    __slots__ = ("data", "strategies")
+
+    def __init__(self, data):
+        strategies = {name: Strategy(name, parameters) for name, parameters in data["strategies"].items()}
+        object.__setattr__(self, "data", data)
+        object.__setattr__(self, "strategies", MappingProxyType(strategies))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"'{type(self).__name__}' is immutable")
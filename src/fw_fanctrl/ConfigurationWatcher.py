@@ -0,0 +1,85 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+
+# linux/inotify.h
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+
+
+# calls "on_change" whenever the configuration file is rewritten, in place or by renaming another file over it.
+# the parent directory is watched rather than the file itself, so that editors replacing the file are also noticed.
+class ConfigurationWatcher:
+    path = None
+    on_change = None
+    inotify_fd = None
+    stop_pipe = None
+    thread = None
+
+    def __init__(self, path, on_change):
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+
+    def start(self):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            self.inotify_fd = libc.inotify_init1(IN_CLOEXEC | IN_NONBLOCK)
+            if self.inotify_fd < 0:
+                raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+            directory = os.path.dirname(self.path).encode()
+            if libc.inotify_add_watch(self.inotify_fd, directory, IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+                os.close(self.inotify_fd)
+                raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        except (OSError, AttributeError) as e:
+            # not fatal, the configuration can still be reloaded with the 'reload' command
+            print(f"[Warning] > configuration file watching unavailable: {e}", file=sys.stderr)
+            self.inotify_fd = None
+            return False
+        self.stop_pipe = os.pipe()
+        self.thread = threading.Thread(target=self.watch)
+        self.thread.daemon = True
+        self.thread.start()
+        return True
+
+    def stop(self):
+        if self.thread is None:
+            return
+        os.write(self.stop_pipe[1], b"\0")
+        self.thread.join()
+        self.thread = None
+
+    def watch(self):
+        name = os.path.basename(self.path).encode()
+        try:
+            while True:
+                readable, _, _ = select.select([self.inotify_fd, self.stop_pipe[0]], [], [])
+                if self.stop_pipe[0] in readable:
+                    return
+                try:
+                    buffer = os.read(self.inotify_fd, 65536)
+                except BlockingIOError:
+                    continue
+                # the events of a single read are coalesced into at most one change notification
+                changed = False
+                offset = 0
+                while offset < len(buffer):
+                    _, mask, _, length = INOTIFY_EVENT_HEADER.unpack_from(buffer, offset)
+                    offset += INOTIFY_EVENT_HEADER.size
+                    event_name = buffer[offset : offset + length].rstrip(b"\0")
+                    offset += length
+                    if event_name == name and mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                        changed = True
+                if changed:
+                    self.on_change()
+        finally:
+            os.close(self.inotify_fd)
+            for fd in self.stop_pipe:
+                os.close(fd)
+            self.stop_pipe = None
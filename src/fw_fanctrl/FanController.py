@@ -1,19 +1,37 @@
-import collections
+import signal
 import sys
 import threading
-from time import sleep
+import time
+from time import monotonic, perf_counter
 
+from fw_fanctrl import PAUSE_SIGNAL, SuspendSignals
 from fw_fanctrl.Configuration import Configuration
+from fw_fanctrl.ConfigurationWatcher import ConfigurationWatcher
+from fw_fanctrl.LatencyHistogram import LatencyHistogram
+from fw_fanctrl.MetricsServer import MetricsServer
+from fw_fanctrl.PidController import PidController
+from fw_fanctrl.PowerStateCache import PowerStateCache
+from fw_fanctrl.Profiler import Profiler
+from fw_fanctrl.Scheduler import Scheduler
+from fw_fanctrl.SpeedWriter import SpeedWriter
+from fw_fanctrl.StateFile import StateFile
+from fw_fanctrl.Strategy import PID
+from fw_fanctrl.TelemetryRecorder import TelemetryRecorder
+from fw_fanctrl.TelemetrySubscription import TelemetrySubscription
+from fw_fanctrl.TemperatureHistory import TemperatureHistory
 from fw_fanctrl.dto.command_result.ConfigurationReloadCommandResult import ConfigurationReloadCommandResult
 from fw_fanctrl.dto.command_result.PrintActiveCommandResult import PrintActiveCommandResult
 from fw_fanctrl.dto.command_result.PrintCurrentStrategyCommandResult import PrintCurrentStrategyCommandResult
 from fw_fanctrl.dto.command_result.PrintFanSpeedCommandResult import PrintFanSpeedCommandResult
+from fw_fanctrl.dto.command_result.PrintSensorsCommandResult import PrintSensorsCommandResult
+from fw_fanctrl.dto.command_result.PrintStatsCommandResult import PrintStatsCommandResult
 from fw_fanctrl.dto.command_result.PrintStrategyListCommandResult import PrintStrategyListCommandResult
 from fw_fanctrl.dto.command_result.ServicePauseCommandResult import ServicePauseCommandResult
 from fw_fanctrl.dto.command_result.ServiceResumeCommandResult import ServiceResumeCommandResult
 from fw_fanctrl.dto.command_result.SetConfigurationCommandResult import SetConfigurationCommandResult
 from fw_fanctrl.dto.command_result.StrategyChangeCommandResult import StrategyChangeCommandResult
 from fw_fanctrl.dto.command_result.StrategyResetCommandResult import StrategyResetCommandResult
+from fw_fanctrl.dto.command_result.WatchCommandResult import WatchCommandResult
 from fw_fanctrl.dto.runtime_result.RuntimeResult import RuntimeResult
 from fw_fanctrl.dto.runtime_result.StatusRuntimeResult import StatusRuntimeResult
 from fw_fanctrl.enum.CommandStatus import CommandStatus
@@ -24,59 +42,391 @@ from fw_fanctrl.exception.UnknownCommandException import UnknownCommandException
 class FanController:
     hardware_controller = None
     socket_controller = None
+    power_state_cache = None
     configuration = None
+    configuration_watcher = None
+    # why the last automatic configuration reload failed, None if it succeeded
+    configuration_error = None
     overwritten_strategy = None
     output_format = None
+    # the speed of the fastest fan when they are driven separately
     speed = 0
-    temp_history = collections.deque([0] * 100, maxlen=100)
+    # the number of fans of the hardware, and the speed, write time and temperature of each of them,
+    # None while they are driven together
+    fan_count = None
+    fan_speeds = None
+    fan_write_times = None
+    fan_write_temperatures = None
+    last_speed_write_time = None
+    last_speed_write_temperature = None
+    issued_speed_writes = 0
+    suppressed_speed_writes = 0
+    temp_history = None
+    last_temperature = None
+    # per sensor, the histories and the latest sample
+    sensor_histories = None
+    last_temperatures = None
+    # the state of the current strategy, when it is a PID one
+    pid_controller = None
     active = True
-    timecount = 0
+    scheduler = None
+    sampling_interval = 1
+    min_sampling_interval = 1
+    max_sampling_interval = 1
+    subscriptions = None
+    telemetry_recorder = None
+    metrics_server = None
+    # writes the fan speeds from its own thread, None to write them from the control loop
+    speed_writer = None
+    socket_thread = None
+    # times the stages of the loop and the socket commands, None when disabled
+    profiler = None
+    stats_interval = None
+    # duration of the control loop iterations
+    tick_histogram = None
+    # the strategy and effective temperature of the latest speed update
+    last_strategy_name = None
+    last_effective_temperature = None
+    # when the service was last resumed, until the first fan speed write that followed
+    resumed_at = None
+    # the time from the last resume to the first fan speed write
+    resume_latency = None
+    # the latest CPU load (in percent), when the strategy feeds it forward, and since when it is above the threshold
+    cpu_load = None
+    load_sustained_since = None
+    feed_forward_active = False
+    # keeps the state across restarts, None when disabled
+    state_file = None
+    state_save_interval = 30
+    # the time source of the control loop, replaced to run it faster than real time (e.g. in simulations)
+    clock = None
 
-    def __init__(self, hardware_controller, socket_controller, config_path, strategy_name, output_format):
+    def __init__(
+        self,
+        hardware_controller,
+        socket_controller,
+        config_path,
+        strategy_name,
+        output_format,
+        power_state_ttl=30,
+        min_sampling_interval=1,
+        max_sampling_interval=1,
+        watch_config=False,
+        history_file=None,
+        history_size=86400,
+        metrics_address=None,
+        stats=False,
+        stats_interval=None,
+        async_writes=False,
+        max_speed_ramp=None,
+        state_file=None,
+        state_max_age=120,
+        clock=monotonic,
+    ):
         self.hardware_controller = hardware_controller
         self.socket_controller = socket_controller
+        self.clock = clock
+        # serializes the commands (several socket clients may be served at once), the configuration file changes
+        # and the suspend signals, as they all swap the configuration or the strategy in use
+        self.command_lock = threading.RLock()
+        self.scheduler = Scheduler(clock)
+        self.subscriptions = []
+        self.subscriptions_lock = threading.Lock()
+        self.min_sampling_interval = min_sampling_interval
+        self.max_sampling_interval = max(min_sampling_interval, max_sampling_interval)
+        self.sampling_interval = self.min_sampling_interval
+        self.power_state_cache = PowerStateCache(
+            hardware_controller, ttl=power_state_ttl, on_change=lambda on_ac: self.request_speed_update(), clock=clock
+        )
+        self.power_state_cache.start_uevent_listener()
+        self.temp_history = TemperatureHistory()
+        self.sensor_histories = {}
+        self.last_temperatures = {}
+        if history_file is not None:
+            self.telemetry_recorder = TelemetryRecorder(history_file, history_size)
+        self.tick_histogram = LatencyHistogram()
+        if async_writes or max_speed_ramp is not None:
+            self.speed_writer = SpeedWriter(hardware_controller, max_speed_ramp, clock=clock)
+            # the writer thread can only wait for the real time, on a simulated clock the ticks write the speeds
+            if clock is monotonic:
+                self.speed_writer.start()
         self.configuration = Configuration(config_path)
 
         if strategy_name is not None and strategy_name != "":
             self.overwrite_strategy(strategy_name)
 
+        if state_file is not None:
+            self.state_file = StateFile(state_file, state_max_age)
+            # the strategy given on the command line prevails over the saved one
+            self.restore_state(self.state_file.load(), restore_strategy=self.overwritten_strategy is None)
+
+        if watch_config:
+            self.configuration_watcher = ConfigurationWatcher(config_path, self.on_configuration_file_change)
+            self.configuration_watcher.start()
+
         self.output_format = output_format
 
-        t = threading.Thread(
-            target=self.socket_controller.start_server_socket,
-            args=[self.command_manager],
-        )
+        self.stats_interval = stats_interval
+        if stats or stats_interval is not None:
+            self.instrument()
+
+        if metrics_address is not None:
+            self.metrics_server = MetricsServer(metrics_address, self.collect_metrics)
+            self.metrics_server.start()
+
+        # without socket controller, the service can only be driven through its methods (e.g. in simulations)
+        if self.socket_controller is not None:
+            self.socket_thread = threading.Thread(
+                target=self.socket_controller.start_server_socket,
+                args=[self.command_manager],
+            )
+            self.socket_thread.daemon = True
+            self.socket_thread.start()
+
+    # stops the threads and closes the sockets started along with the controller, e.g. between the runs of a benchmark
+    def close(self):
+        self.power_state_cache.stop_uevent_listener()
+        if self.speed_writer is not None:
+            self.speed_writer.stop()
+        if self.configuration_watcher is not None:
+            self.configuration_watcher.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        if self.socket_thread is not None:
+            self.socket_controller.stop_server_socket()
+            self.socket_thread.join()
+            self.socket_thread = None
+
+    # the suspend signals are queued by their handlers and taken by a dedicated thread, which acts on them right away,
+    # whatever the control loop is doing
+    def start_suspend_signal_listener(self):
+        if not SuspendSignals.install_handlers():
+            return
+        t = threading.Thread(target=self.listen_suspend_signals)
         t.daemon = True
         t.start()
 
+    def listen_suspend_signals(self):
+        while True:
+            signum = SuspendSignals.received.get()
+            # the listener must survive a failure, the next signals would never be handled otherwise
+            try:
+                with self.command_lock:
+                    if signum == PAUSE_SIGNAL:
+                        self.pause()
+                    else:
+                        self.resume()
+            except Exception as e:
+                print(f"[Error] > could not handle the signal {signal.Signals(signum).name}: {e}", file=sys.stderr)
+
+    def get_state(self):
+        return {
+            "overwrittenStrategy": self.overwritten_strategy.name if self.overwritten_strategy is not None else None,
+            "speed": self.speed,
+            "temperatures": self.temp_history.latest(len(self.temp_history)),
+            "sensorTemperatures": {
+                name: history.latest(len(history)) for name, history in self.sensor_histories.items()
+            },
+        }
+
+    # warm start: the moving averages go on from the saved temperatures, the PID controller from the saved speed
+    def restore_state(self, state, restore_strategy=True):
+        if state is None:
+            return
+        for temperature in state.get("temperatures", []):
+            self.temp_history.append(temperature)
+        for name, temperatures in state.get("sensorTemperatures", {}).items():
+            history = self.sensor_histories[name] = TemperatureHistory()
+            for temperature in temperatures:
+                history.append(temperature)
+        self.speed = state.get("speed", 0)
+        strategy_name = state.get("overwrittenStrategy")
+        if restore_strategy and strategy_name is not None and strategy_name in self.configuration.get_strategies():
+            self.overwrite_strategy(strategy_name)
+
+    def save_state(self):
+        self.state_file.save(self.get_state())
+
+    # saves the state on the next loop iteration, e.g. after a strategy change, which must not be lost on a crash
+    def request_state_save(self):
+        if self.state_file is not None:
+            self.scheduler.schedule("state")
+
+    def instrument(self):
+        self.profiler = Profiler()
+        self.profiler.instrument(self.hardware_controller, "get_temperatures", "get_temperature")
+        self.profiler.instrument(self.hardware_controller, "is_on_ac")
+        self.profiler.instrument(self.hardware_controller, "set_speed")
+        self.profiler.instrument(self.hardware_controller, "set_fan_speed", "set_speed")
+        self.profiler.instrument(self, "adapt_speed")
+        self.profiler.instrument(self, "publish_telemetry")
+        self.profiler.instrument(self, "print_state")
+        self.profiler.instrument(self, "command_manager", "socket_command")
+
     def get_actual_temperature(self):
         return self.hardware_controller.get_temperature()
 
+    # reads every sensor at once, records them and returns the hottest temperature
+    def sample_temperatures(self):
+        temperatures = self.hardware_controller.get_temperatures()
+        for name, temperature in temperatures.items():
+            history = self.sensor_histories.get(name)
+            if history is None:
+                history = self.sensor_histories[name] = TemperatureHistory()
+            history.append(temperature)
+        self.last_temperatures = temperatures
+        return self.hardware_controller.get_hottest(temperatures)
+
     def set_speed(self, speed):
         self.speed = speed
-        self.hardware_controller.set_speed(speed)
+        self.fan_speeds = None
+        if self.speed_writer is not None:
+            self.speed_writer.submit(speed)
+        else:
+            self.hardware_controller.set_speed(speed)
+        self.last_speed_write_time = self.clock()
+        self.issued_speed_writes += 1
+        self.record_resume_latency()
+
+    def set_fan_speed(self, index, speed, temperature, now):
+        self.fan_speeds[index] = speed
+        if self.speed_writer is not None:
+            self.speed_writer.submit(speed, index)
+        else:
+            self.hardware_controller.set_fan_speed(index, speed)
+        self.fan_write_times[index] = now
+        self.fan_write_temperatures[index] = temperature
+        self.last_speed_write_time = now
+        self.issued_speed_writes += 1
+        self.record_resume_latency()
+
+    def record_resume_latency(self):
+        if self.resumed_at is not None:
+            self.resume_latency = self.clock() - self.resumed_at
+            self.resumed_at = None
+
+    def get_fan_count(self):
+        if self.fan_count is None:
+            self.fan_count = self.hardware_controller.get_fan_count()
+        return self.fan_count
+
+    def should_write_speed(self, strategy, new_speed, temperature):
+        # after driving the fans separately, they must all be set to the new speed
+        if not strategy.suppress_writes or self.last_speed_write_time is None or self.fan_speeds is not None:
+            return True
+        # periodically rewrite the speed for safety, in case something else changed it behind our back
+        if self.clock() - self.last_speed_write_time >= strategy.forced_refresh_interval:
+            return True
+        return self.is_significant_change(
+            strategy, self.speed, new_speed, self.last_speed_write_temperature, temperature
+        )
+
+    # a fan is only written when its speed changed, or for the periodic safety refresh
+    def should_write_fan_speed(self, strategy, index, new_speed, temperature, now):
+        last_write_time = self.fan_write_times[index]
+        if last_write_time is None or now - last_write_time >= strategy.forced_refresh_interval:
+            return True
+        if not strategy.suppress_writes:
+            return new_speed != self.fan_speeds[index]
+        return self.is_significant_change(
+            strategy, self.fan_speeds[index], new_speed, self.fan_write_temperatures[index], temperature
+        )
+
+    # whether going from "speed" (written at "write_temperature") to "new_speed" is worth a write
+    @staticmethod
+    def is_significant_change(strategy, speed, new_speed, write_temperature, temperature):
+        if new_speed == speed:
+            return False
+        # the fan must always be able to reach its maximum speed, whatever the hysteresis and deadband
+        if new_speed == 100:
+            return True
+        if new_speed > speed and temperature < write_temperature + strategy.rising_hysteresis:
+            return False
+        if new_speed < speed and temperature > write_temperature - strategy.falling_hysteresis:
+            return False
+        # the fan must still be able to fully stop, once the temperature has fallen enough
+        return abs(new_speed - speed) >= strategy.speed_deadband or new_speed == 0
 
     def is_on_ac(self):
-        return self.hardware_controller.is_on_ac()
+        return self.power_state_cache.is_on_ac()
 
     def pause(self):
         self.active = False
+        # a pending speed must not be written once the EC has taken over
+        if self.speed_writer is not None:
+            self.speed_writer.cancel()
         self.hardware_controller.pause()
 
     def resume(self):
+        self.resumed_at = self.clock()
+        if not self.active:
+            # the temperatures before the pause (e.g. before a suspend) no longer tell anything, nor does the power
+            # state. they are forgotten before the control loop can run again
+            self.temp_history.clear()
+            for history in self.sensor_histories.values():
+                history.clear()
+            self.last_temperature = None
+            self.last_temperatures = {}
+            self.power_state_cache.invalidate()
+        # the hardware fan control took over in the meantime, the next speed must be written
+        self.force_speed_write()
+        self.pid_controller = None
         self.active = True
         self.hardware_controller.resume()
+        self.scheduler.schedule("sample")
+        self.request_speed_update()
+
+    # the next speed update writes the speed of every fan, whatever the write suppression
+    def force_speed_write(self):
+        self.last_speed_write_time = None
+        if self.fan_write_times is not None:
+            self.fan_write_times = [None] * len(self.fan_write_times)
+
+    # makes the control loop re-evaluate the fan speed right away (e.g. after a strategy change)
+    def request_speed_update(self):
+        self.scheduler.schedule("speed_update")
+        self.scheduler.wake()
 
     def overwrite_strategy(self, strategy_name):
         if strategy_name not in self.configuration.get_strategies():
             self.clear_overwritten_strategy()
             return
         self.overwritten_strategy = self.configuration.get_strategy(strategy_name)
-        self.timecount = 0
+        self.request_state_save()
+        self.request_speed_update()
 
     def clear_overwritten_strategy(self):
         self.overwritten_strategy = None
-        self.timecount = 0
+        self.request_state_save()
+        self.request_speed_update()
+
+    # the overwritten strategy must come from the current configuration snapshot
+    def on_configuration_change(self):
+        if self.overwritten_strategy is not None:
+            self.overwrite_strategy(self.overwritten_strategy.name)
+        self.request_speed_update()
+
+    # called from the watcher thread, a bad edit keeps the last good configuration in use
+    def on_configuration_file_change(self):
+        with self.command_lock:
+            self.reload_changed_configuration()
+
+    def reload_changed_configuration(self):
+        try:
+            changed = self.configuration.reload()
+        except Exception as e:
+            self.configuration_error = str(e)
+            print(f"[Error] > configuration file change ignored: {e}", file=sys.stderr)
+            return
+        self.configuration_error = None
+        if changed:
+            self.on_configuration_change()
+
+    # a deferred save has no client to report its failure to
+    def get_configuration_error(self):
+        if self.configuration_error is None and self.configuration.save_error is not None:
+            return f"could not save the configuration: {self.configuration.save_error}"
+        return self.configuration_error
 
     def get_current_strategy(self):
         if self.overwritten_strategy is not None:
@@ -86,6 +436,10 @@ class FanController:
         return self.configuration.get_discharging_strategy()
 
     def command_manager(self, args):
+        with self.command_lock:
+            return self.handle_command(args)
+
+    def handle_command(self, args):
         if args.command == "reset" or (args.command == "use" and args.strategy == "defaultStrategy"):
             self.clear_overwritten_strategy()
             return StrategyResetCommandResult(self.get_current_strategy().name, self.overwritten_strategy is None)
@@ -96,8 +450,8 @@ class FanController:
             return StrategyChangeCommandResult(self.get_current_strategy().name, self.overwritten_strategy is None)
         elif args.command == "reload":
             self.configuration.reload()
-            if self.overwritten_strategy is not None:
-                self.overwrite_strategy(self.overwritten_strategy.name)
+            self.configuration_error = None
+            self.on_configuration_change()
             return ConfigurationReloadCommandResult(self.get_current_strategy().name, self.overwritten_strategy is None)
         elif args.command == "pause":
             self.pause()
@@ -117,53 +471,167 @@ class FanController:
             elif args.print_selection == "list":
                 return PrintStrategyListCommandResult(list(self.configuration.get_strategies()))
             elif args.print_selection == "speed":
-                return PrintFanSpeedCommandResult(str(self.speed))
+                return PrintFanSpeedCommandResult(str(self.speed), self.get_fan_speeds())
+            elif args.print_selection == "stats":
+                return PrintStatsCommandResult(self.profiler.get_statistics() if self.profiler is not None else None)
+            elif args.print_selection == "sensors":
+                return PrintSensorsCommandResult(self.hardware_controller.get_temperatures())
+        elif args.command == "watch":
+            return WatchCommandResult(self.subscribe(args.fields, args.interval), args.output_format)
         elif args.command == "set_config":
-            self.configuration.data = self.configuration.parse(args.provided_config)
-            if self.overwritten_strategy is not None:
-                self.overwrite_strategy(self.overwritten_strategy.name)
+            self.configuration.set_data(self.configuration.parse(args.provided_config))
+            self.configuration_error = None
+            self.on_configuration_change()
             self.configuration.save()
             return SetConfigurationCommandResult(
-                self.get_current_strategy().name, vars(self.configuration), self.overwritten_strategy is None
+                self.get_current_strategy().name, self.configuration.to_dict(), self.overwritten_strategy is None
             )
         raise UnknownCommandException(f"Unknown command: '{args.command}', unexpected.")
 
-    # return mean temperature over a given time interval (in seconds)
-    def get_moving_average_temperature(self, time_interval):
-        sliced_temp_history = [x for x in self.temp_history if x > 0][-time_interval:]
-        if len(sliced_temp_history) == 0:
+    # the number of samples covering the given time interval (in seconds), at the current sampling interval
+    def get_window_size(self, time_interval):
+        return max(1, round(time_interval / self.sampling_interval))
+
+    # return filtered (by default, mean) temperature over a given time interval (in seconds)
+    def get_moving_average_temperature(self, time_interval, filter_type="simple"):
+        filtered_temperature = self.temp_history.get_filtered(self.get_window_size(time_interval), filter_type)
+        if filtered_temperature is None:
             return self.get_actual_temperature()
-        return float(round(sum(sliced_temp_history) / len(sliced_temp_history), 2))
+        return float(round(filtered_temperature, 2))
 
-    def get_effective_temperature(self, current_temp, time_interval):
+    def get_effective_temperature(self, current_temp, time_interval, filter_type="simple"):
         # the moving average temperature count for 2/3 of the effective temperature
-        return float(round(min(self.get_moving_average_temperature(time_interval), current_temp), 2))
+        return float(round(min(self.get_moving_average_temperature(time_interval, filter_type), current_temp), 2))
 
-    def adapt_speed(self, current_temp):
-        current_strategy = self.get_current_strategy()
-        current_temp = self.get_effective_temperature(current_temp, current_strategy.moving_average_interval)
-        min_point = current_strategy.speed_curve[0]
-        max_point = current_strategy.speed_curve[-1]
-        for e in current_strategy.speed_curve:
-            if current_temp > e["temp"]:
-                min_point = e
-            else:
-                max_point = e
-                break
+    # the effective temperature of the given sensors (by default, the sensors of the strategy), from the latest samples
+    def get_sensor_temperatures(self, strategy, names=None):
+        if names is None:
+            names = [name for name, _, _ in strategy.sensors]
+        temperatures = {}
+        for name in names:
+            current_temp = self.last_temperatures.get(name)
+            if current_temp is None:
+                continue
+            filtered_temperature = self.sensor_histories[name].get_filtered(
+                self.get_window_size(strategy.moving_average_interval), strategy.moving_average_filter
+            )
+            temperatures[name] = (
+                current_temp if filtered_temperature is None else min(filtered_temperature, current_temp)
+            )
+        return temperatures
+
+    # a new controller takes over from the current speed whenever the strategy (or its configuration) changes
+    def get_pid_controller(self, strategy):
+        if self.pid_controller is None or self.pid_controller.strategy is not strategy:
+            self.pid_controller = PidController(strategy, self.speed)
+        return self.pid_controller
+
+    # the speed the strategy asks for the given temperature. a PID strategy is only stepped when "now" is provided,
+    # otherwise its latest speed is returned
+    def get_strategy_speed(self, strategy, temperature, now=None):
+        if strategy.control_mode != PID:
+            return strategy.get_speed(temperature)
+        pid_controller = self.get_pid_controller(strategy)
+        if now is not None:
+            return pid_controller.update(temperature, now)
+        return int(round(pid_controller.speed)) if pid_controller.speed is not None else self.speed
+
+    # returns the effective temperature and the fan speed the strategy asks for
+    def evaluate_strategy(self, strategy, current_temp, now=None):
+        temperature = None
+        sensors_speed = None
+        if strategy.sensors is not None:
+            temperature, sensors_speed, sensors_temperature = strategy.combine_sensors(
+                self.get_sensor_temperatures(strategy)
+            )
+        # none of the strategy sensors is available, the hottest one is used instead
+        if temperature is None and sensors_speed is None:
+            temperature = self.get_effective_temperature(
+                current_temp, strategy.moving_average_interval, strategy.moving_average_filter
+            )
+        if temperature is not None:
+            speed = self.get_strategy_speed(strategy, temperature, now)
+            if sensors_speed is None or speed >= sensors_speed:
+                return temperature, speed
+        return float(round(sensors_temperature, 2)), sensors_speed
 
-        if min_point == max_point:
-            new_speed = min_point["speed"]
+    # feeds the CPU load forward: once the load is sustained, the fans spin up before the temperature rises
+    def sample_cpu_load(self, strategy, now):
+        load = self.hardware_controller.get_cpu_load() if strategy.feed_forward_speed is not None else None
+        if load is None:
+            self.cpu_load = None
+            self.load_sustained_since = None
+            self.feed_forward_active = False
+            return
+        self.cpu_load = round(max(load) * 100, 2)
+        if self.cpu_load < strategy.load_threshold:
+            self.load_sustained_since = None
         else:
-            slope = (max_point["speed"] - min_point["speed"]) / (max_point["temp"] - min_point["temp"])
-            new_speed = int(min_point["speed"] + (current_temp - min_point["temp"]) * slope)
-        if self.active:
+            # the load must be followed closely, even while the temperature is stable
+            self.sampling_interval = self.min_sampling_interval
+            if self.load_sustained_since is None:
+                self.load_sustained_since = now
+        active = self.load_sustained_since is not None and now - self.load_sustained_since >= strategy.sustained_for
+        if active and not self.feed_forward_active:
+            # the temperature has not risen yet, so neither the update period nor the hysteresis may delay the fans
+            self.force_speed_write()
+            self.scheduler.schedule("speed_update", now)
+        self.feed_forward_active = active
+
+    def get_feed_forward_speed(self, strategy):
+        if self.feed_forward_active and strategy.feed_forward_speed is not None:
+            return strategy.feed_forward_speed
+        return 0
+
+    def adapt_speed(self, current_temp):
+        current_strategy = self.get_current_strategy()
+        current_temp, new_speed = self.evaluate_strategy(current_strategy, current_temp, self.clock())
+        feed_forward_speed = self.get_feed_forward_speed(current_strategy)
+        new_speed = max(new_speed, feed_forward_speed)
+        self.last_strategy_name = current_strategy.name
+        self.last_effective_temperature = current_temp
+        if not self.active:
+            return
+        if current_strategy.fans is not None:
+            fan_speeds = [
+                (temperature, max(speed, feed_forward_speed))
+                for temperature, speed in current_strategy.get_fan_speeds(
+                    self.get_sensor_temperatures(current_strategy, current_strategy.fan_sensor_names), current_temp
+                )
+            ]
+            if len(fan_speeds) == self.get_fan_count():
+                self.adapt_fan_speeds(current_strategy, fan_speeds)
+                return
+            # the strategy was written for another machine, all the fans run at the highest speed for safety
+            new_speed = max(speed for _, speed in fan_speeds)
+        if self.should_write_speed(current_strategy, new_speed, current_temp):
             self.set_speed(new_speed)
+            self.last_speed_write_temperature = current_temp
+        else:
+            self.suppressed_speed_writes += 1
+
+    # applies the (temperature, speed) of every fan, computed in a single pass, writing only the fans that changed
+    def adapt_fan_speeds(self, strategy, fan_speeds):
+        if self.fan_speeds is None:
+            # the fans were driven together until now, so they all start from the same speed
+            self.fan_speeds = [self.speed] * len(fan_speeds)
+            self.fan_write_times = [None] * len(fan_speeds)
+            self.fan_write_temperatures = [None] * len(fan_speeds)
+        now = self.clock()
+        for index, (temperature, speed) in enumerate(fan_speeds):
+            if self.should_write_fan_speed(strategy, index, speed, temperature, now):
+                self.set_fan_speed(index, speed, temperature, now)
+            else:
+                self.suppressed_speed_writes += 1
+        self.speed = max(self.fan_speeds)
 
     def dump_details(self):
         current_strategy = self.get_current_strategy()
         current_temperature = self.get_actual_temperature()
-        moving_average_temp = self.get_moving_average_temperature(current_strategy.moving_average_interval)
-        effective_temp = self.get_effective_temperature(current_temperature, current_strategy.moving_average_interval)
+        moving_average_temp = self.get_moving_average_temperature(
+            current_strategy.moving_average_interval, current_strategy.moving_average_filter
+        )
+        effective_temp, _ = self.evaluate_strategy(current_strategy, current_temperature)
 
         return StatusRuntimeResult(
             current_strategy.name,
@@ -173,34 +641,270 @@ class FanController:
             moving_average_temp,
             effective_temp,
             self.active,
-            vars(self.configuration),
+            self.configuration.to_dict(),
+            self.issued_speed_writes,
+            self.suppressed_speed_writes,
+            {**self.scheduler.get_statistics(), "samplingInterval": self.sampling_interval},
+            self.get_configuration_error(),
+            self.get_fan_speeds(),
+            self.speed_writer.get_statistics() if self.speed_writer is not None else None,
+            round(self.resume_latency * 1000, 3) if self.resume_latency is not None else None,
+            self.cpu_load,
+            self.feed_forward_active,
+        )
+
+    # a copy of the speed of each fan, None while they are driven together
+    def get_fan_speeds(self):
+        return list(self.fan_speeds) if self.fan_speeds is not None else None
+
+    def subscribe(self, fields=None, min_interval=0):
+        subscription = TelemetrySubscription(fields, min_interval, on_close=self.unsubscribe)
+        with self.subscriptions_lock:
+            self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.subscriptions_lock:
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
+
+    # sends the values computed by the loop to the subscribers and the recorder, without any additional hardware call
+    def publish_telemetry(self, temp):
+        if len(self.subscriptions) == 0 and self.telemetry_recorder is None:
+            return
+        current_strategy = self.get_current_strategy()
+        moving_average_temp = self.temp_history.get_filtered(
+            self.get_window_size(current_strategy.moving_average_interval), current_strategy.moving_average_filter
         )
+        moving_average_temp = float(round(moving_average_temp if moving_average_temp is not None else temp, 2))
+        record = {
+            "timestamp": time.time(),
+            "strategy": current_strategy.name,
+            "default": self.overwritten_strategy is None,
+            "speed": self.speed,
+            "speeds": self.get_fan_speeds(),
+            "temperature": temp,
+            "movingAverageTemperature": moving_average_temp,
+            "effectiveTemperature": self.evaluate_strategy(current_strategy, temp)[0],
+            "active": self.active,
+        }
+        if self.telemetry_recorder is not None:
+            self.telemetry_recorder.record(
+                record["timestamp"],
+                self.last_temperatures,
+                record["effectiveTemperature"],
+                self.speed,
+                current_strategy.name,
+                self.power_state_cache.on_ac,
+                self.active,
+            )
+        with self.subscriptions_lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            subscription.push(record)
+
+    # the metrics served by the metrics server, only made of values already in memory
+    def collect_metrics(self):
+        writes = [
+            ({"result": "issued"}, self.issued_speed_writes),
+            ({"result": "suppressed"}, self.suppressed_speed_writes),
+        ]
+        scheduler_statistics = self.scheduler.get_statistics()
+        strategy_samples = []
+        # no strategy was evaluated before the first tick
+        if self.last_strategy_name is not None:
+            default = str(self.overwritten_strategy is None).lower()
+            strategy_samples.append(({"strategy": self.last_strategy_name, "default": default}, 1))
+        metrics = [
+            ("fw_fanctrl_temperature_celsius", "gauge", "Hottest sensor temperature.", [({}, self.last_temperature)]),
+            (
+                "fw_fanctrl_sensor_temperature_celsius",
+                "gauge",
+                "Temperature of each sensor.",
+                [({"sensor": name}, temperature) for name, temperature in self.last_temperatures.items()],
+            ),
+            (
+                "fw_fanctrl_effective_temperature_celsius",
+                "gauge",
+                "Temperature the fan speed was computed from.",
+                [({}, self.last_effective_temperature)],
+            ),
+            ("fw_fanctrl_fan_speed_percent", "gauge", "Fan speed (duty), of the fastest fan.", [({}, self.speed)]),
+            (
+                "fw_fanctrl_fan_duty_percent",
+                "gauge",
+                "Speed (duty) of each fan, when they are driven separately.",
+                [({"fan": index}, speed) for index, speed in enumerate(self.get_fan_speeds() or [])],
+            ),
+            (
+                "fw_fanctrl_strategy_info",
+                "gauge",
+                "Strategy in use.",
+                strategy_samples,
+            ),
+            ("fw_fanctrl_active", "gauge", "Whether the service controls the fan.", [({}, self.active)]),
+            ("fw_fanctrl_on_ac", "gauge", "Whether the system is on AC power.", [({}, self.power_state_cache.on_ac)]),
+            ("fw_fanctrl_speed_writes_total", "counter", "Fan speed writes to the EC.", writes),
+            (
+                "fw_fanctrl_sampling_interval_seconds",
+                "gauge",
+                "Interval between two temperature samples.",
+                [({}, self.sampling_interval)],
+            ),
+            (
+                "fw_fanctrl_tick_jitter_seconds",
+                "gauge",
+                "Lateness of the control loop wakeups.",
+                [
+                    ({"stat": "mean"}, scheduler_statistics["jitterMeanMs"] / 1000),
+                    ({"stat": "max"}, scheduler_statistics["jitterMaxMs"] / 1000),
+                ],
+            ),
+            (
+                "fw_fanctrl_configuration_error",
+                "gauge",
+                "Whether the last automatic configuration reload or save failed.",
+                [({}, self.get_configuration_error() is not None)],
+            ),
+            (
+                "fw_fanctrl_cpu_load_percent",
+                "gauge",
+                "CPU load (highest of the utilisation and pressure), when the strategy feeds it forward.",
+                [({}, self.cpu_load)],
+            ),
+            (
+                "fw_fanctrl_feed_forward_active",
+                "gauge",
+                "Whether a sustained CPU load keeps the fans at the feed-forward speed.",
+                [({}, self.feed_forward_active)],
+            ),
+            (
+                "fw_fanctrl_resume_latency_seconds",
+                "gauge",
+                "Time from the last resume to the first fan speed write.",
+                [({}, self.resume_latency)],
+            ),
+            (
+                "fw_fanctrl_tick_duration_seconds",
+                "histogram",
+                "Duration of the control loop iterations.",
+                self.tick_histogram,
+            ),
+        ]
+        if self.speed_writer is not None:
+            metrics += [
+                (
+                    "fw_fanctrl_speed_writes_dropped_total",
+                    "counter",
+                    "Fan speeds replaced by a newer one before being written.",
+                    [({}, self.speed_writer.dropped)],
+                ),
+                (
+                    "fw_fanctrl_speed_write_queue_latency_seconds",
+                    "histogram",
+                    "Time between the computation of a fan speed and its write.",
+                    self.speed_writer.queue_latency_histogram,
+                ),
+            ]
+        # a value not known yet (e.g. before the first tick) is left out rather than exported as NaN
+        return [
+            (
+                (name, metric_type, description, samples)
+                if metric_type == "histogram"
+                else (name, metric_type, description, [sample for sample in samples if sample[1] is not None])
+            )
+            for name, metric_type, description, samples in metrics
+        ]
 
     def print_state(self):
         print(self.dump_details().to_output_format(self.output_format))
 
+    # sample faster while the temperature rises quickly, and slower while it is stable
+    def adapt_sampling_interval(self, temp):
+        if self.last_temperature is None or self.min_sampling_interval == self.max_sampling_interval:
+            return
+        rate = (temp - self.last_temperature) / self.sampling_interval
+        if rate >= 1:
+            self.sampling_interval = self.min_sampling_interval
+        elif abs(rate) < 0.2:
+            self.sampling_interval = min(self.sampling_interval * 2, self.max_sampling_interval)
+
+    def schedule_tasks(self, debug=True):
+        self.scheduler.schedule("sample")
+        self.scheduler.schedule("speed_update")
+        if debug:
+            self.scheduler.schedule("output")
+        if self.stats_interval is not None:
+            self.scheduler.schedule("stats", self.clock() + self.stats_interval)
+        if self.state_file is not None:
+            self.scheduler.schedule("state", self.clock() + self.state_save_interval)
+
+    # runs whatever is due at "now": temperature sampling, fan speed update, status output...
+    def tick(self, now):
+        started_at = perf_counter()
+        temp = None
+        if self.scheduler.is_due("sample", now):
+            temp = self.sample_temperatures()
+            self.adapt_sampling_interval(temp)
+            self.sample_cpu_load(self.get_current_strategy(), now)
+            self.scheduler.advance("sample", self.sampling_interval, now)
+        # update fan speed every "fanSpeedUpdateFrequency" seconds
+        if self.scheduler.is_due("speed_update", now):
+            if temp is None and self.last_temperature is None:
+                temp = self.sample_temperatures()
+            self.adapt_speed(temp if temp is not None else self.last_temperature)
+            self.scheduler.advance("speed_update", self.get_current_strategy().fan_speed_update_frequency, now)
+        if self.speed_writer is not None and self.speed_writer.thread is None:
+            self.speed_writer.write_due()
+
+        if temp is not None:
+            if temp > 0:
+                self.temp_history.append(temp)
+            self.last_temperature = temp
+            self.publish_telemetry(temp)
+
+        if self.scheduler.is_due("output", now):
+            self.print_state()
+            self.scheduler.advance("output", 1, now)
+        if self.scheduler.is_due("stats", now):
+            print(f"[Stats] > {self.profiler.format_statistics()}")
+            self.scheduler.advance("stats", self.stats_interval, now)
+        if self.scheduler.is_due("state", now):
+            self.save_state()
+            self.scheduler.advance("state", self.state_save_interval, now)
+        self.tick_histogram.observe(perf_counter() - started_at)
+
+    # turns the termination request (e.g. from systemd) into a regular exit, so that pending work is completed
+    @staticmethod
+    def on_termination_signal(signum, frame):
+        sys.exit(0)
+
     def run(self, debug=True):
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.on_termination_signal)
+        # the signals received since the start of the process were queued, they are handled once fully initialized
+        self.start_suspend_signal_listener()
         try:
+            self.schedule_tasks(debug)
             while True:
-                if self.active:
-                    temp = self.get_actual_temperature()
-                    # update fan speed every "fanSpeedUpdateFrequency" seconds
-                    if self.timecount % self.get_current_strategy().fan_speed_update_frequency == 0:
-                        self.adapt_speed(temp)
-                        self.timecount = 0
-
-                    self.temp_history.append(temp)
-
-                    if debug:
-                        self.print_state()
-                    self.timecount += 1
-                    sleep(1)
-                else:
-                    sleep(5)
+                self.scheduler.wait(idle=not self.active)
+                if not self.active:
+                    continue
+                self.tick(self.clock())
         except InvalidStrategyException as e:
             _rte = RuntimeResult(CommandStatus.ERROR, f"Missing strategy, exiting for safety reasons: {e.args[0]}")
             print(_rte.to_output_format(self.output_format), file=sys.stderr)
         except Exception as e:
             _rte = RuntimeResult(CommandStatus.ERROR, f"Critical error, exiting for safety reasons: {e}")
             print(_rte.to_output_format(self.output_format), file=sys.stderr)
+        finally:
+            # the last configuration change must not be lost
+            try:
+                self.configuration.flush()
+            except OSError as e:
+                print(f"[Error] > could not save the configuration: {e}", file=sys.stderr)
+            if self.state_file is not None:
+                self.save_state()
+            if self.telemetry_recorder is not None:
+                self.telemetry_recorder.close()
         exit(1)
@@ -0,0 +1,30 @@
+from bisect import bisect_left
+
+# upper bounds (in seconds) of the buckets, the last bucket being unbounded
+DEFAULT_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5]
+
+
+# cumulative-ready histogram of durations, observing a value is a binary search and an increment
+class LatencyHistogram:
+    buckets = None
+    counts = None
+    count = 0
+    sum = 0
+
+    def __init__(self, buckets=None):
+        self.buckets = list(buckets if buckets is not None else DEFAULT_BUCKETS)
+        self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, duration):
+        self.counts[bisect_left(self.buckets, duration)] += 1
+        self.count += 1
+        self.sum += duration
+
+    # (upper bound, number of observations lower or equal to it) pairs, ending with the unbounded bucket
+    def get_cumulative_counts(self):
+        cumulative = []
+        total = 0
+        for bound, count in zip(self.buckets + [float("inf")], self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
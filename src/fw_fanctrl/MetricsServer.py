@@ -0,0 +1,108 @@
+import os
+import socketserver
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.metrics_server.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # unix socket clients have no address
+    def address_string(self):
+        return str(self.client_address)
+
+    # scrapes are not worth a journal line each
+    def log_message(self, format, *args):
+        pass
+
+
+class UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+# serves the metrics of the service in the Prometheus text format, over HTTP on "host:port" or on a unix socket path.
+# "collect" returns the values the control loop already has in memory, a scrape never touches the hardware.
+class MetricsServer:
+    address = None
+    collect = None
+    server = None
+
+    def __init__(self, address, collect):
+        self.address = address
+        self.collect = collect
+
+    def start(self):
+        try:
+            if self.address.startswith("/"):
+                if os.path.exists(self.address):
+                    os.remove(self.address)
+                os.makedirs(os.path.dirname(self.address), exist_ok=True)
+                self.server = UnixHTTPServer(self.address, MetricsRequestHandler)
+            else:
+                host, _, port = self.address.rpartition(":")
+                self.server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), MetricsRequestHandler)
+                self.server.daemon_threads = True
+        except (OSError, ValueError) as e:
+            # not fatal, the fan control goes on without metrics
+            print(f"[Warning] > metrics endpoint unavailable on '{self.address}': {e}", file=sys.stderr)
+            self.server = None
+            return False
+        self.server.metrics_server = self
+        t = threading.Thread(target=self.server.serve_forever)
+        t.daemon = True
+        t.start()
+        return True
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    @staticmethod
+    def format_labels(labels):
+        if not labels:
+            return ""
+        pairs = []
+        for key, value in labels.items():
+            escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            pairs.append(f'{key}="{escaped}"')
+        return "{" + ",".join(pairs) + "}"
+
+    @staticmethod
+    def format_value(value):
+        if value is None:
+            return "NaN"
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        return repr(float(value)) if isinstance(value, float) else str(value)
+
+    # the collected metrics are (name, type, help, samples) tuples, the samples being (labels, value) pairs,
+    # or a LatencyHistogram for the histograms
+    def render(self):
+        lines = []
+        for name, metric_type, description, samples in self.collect():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            if metric_type == "histogram":
+                for bound, count in samples.get_cumulative_counts():
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f'{name}_bucket{{le="{le}"}} {count}')
+                lines.append(f"{name}_sum {repr(float(samples.sum))}")
+                lines.append(f"{name}_count {samples.count}")
+                continue
+            for labels, value in samples:
+                lines.append(f"{name}{self.format_labels(labels)} {self.format_value(value)}")
+        return "\n".join(lines) + "\n"
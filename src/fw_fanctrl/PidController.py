@@ -0,0 +1,45 @@
+class PidController:
+    strategy = None
+    speed = None
+    integral = 0
+    last_temperature = None
+    last_time = None
+
+    # "initial_speed" is the speed in use when the controller takes over, so that it does not start with a jump
+    def __init__(self, strategy, initial_speed=None):
+        self.strategy = strategy
+        self.speed = initial_speed
+
+    def reset(self, initial_speed=None):
+        self.speed = initial_speed
+        self.integral = 0
+        self.last_temperature = None
+        self.last_time = None
+
+    # returns the fan speed for the given temperature, "now" being a monotonic time in seconds
+    def update(self, temperature, now):
+        strategy = self.strategy
+        error = temperature - strategy.target_temperature
+        proportional = strategy.proportional_gain * error
+        if self.last_time is None or now <= self.last_time:
+            # first update: the integral term starts from the current speed (bumpless transfer)
+            derivative = 0
+            start_speed = self.speed if self.speed is not None else strategy.min_speed
+            self.integral = start_speed - proportional
+            speed = start_speed
+        else:
+            elapsed = now - self.last_time
+            # on the measurement rather than the error, so that a target change does not kick the fan
+            derivative = strategy.derivative_gain * (temperature - self.last_temperature) / elapsed
+            self.integral += strategy.integral_gain * error * elapsed
+            speed = proportional + self.integral + derivative
+            if strategy.max_speed_change is not None:
+                max_change = strategy.max_speed_change * elapsed
+                speed = max(self.speed - max_change, min(self.speed + max_change, speed))
+        speed = max(strategy.min_speed, min(strategy.max_speed, speed))
+        # anti-windup: the integral is brought back to what the limited speed actually needed
+        self.integral = speed - proportional - derivative
+        self.last_temperature = temperature
+        self.last_time = now
+        self.speed = speed
+        return int(round(speed))
@@ -0,0 +1,111 @@
+import os
+import select
+import socket
+import sys
+import threading
+from time import monotonic
+
+# linux/netlink.h
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_KERNEL_GROUP = 1
+
+
+class PowerStateCache:
+    hardware_controller = None
+    ttl = None
+    on_change = None
+    on_ac = None
+    last_refresh = None
+    uevent_socket = None
+    uevent_thread = None
+    # written to wake the listener up and stop it, a blocked recv is not interrupted by closing its socket
+    stop_pipe = None
+    clock = None
+    # the last online state reported by each power supply
+    supply_online = None
+
+    def __init__(self, hardware_controller, ttl=30, on_change=None, clock=monotonic):
+        self.hardware_controller = hardware_controller
+        self.clock = clock
+        self.ttl = ttl
+        self.on_change = on_change
+        self.supply_online = {}
+        self.lock = threading.Lock()
+
+    def is_on_ac(self):
+        with self.lock:
+            if self.last_refresh is not None and self.clock() - self.last_refresh < self.ttl:
+                return self.on_ac
+        return self.refresh()
+
+    # returns the state read, "on_ac" may already be invalidated by another thread when the caller reads it
+    def refresh(self):
+        with self.lock:
+            previous = self.on_ac
+            on_ac = self.hardware_controller.is_on_ac()
+            self.on_ac = on_ac
+            self.last_refresh = self.clock()
+        if previous is not None and previous != on_ac and self.on_change is not None:
+            self.on_change(on_ac)
+        return on_ac
+
+    # the last known state stays available (e.g. to the metrics), it is only read again on the next call
+    def invalidate(self):
+        with self.lock:
+            self.last_refresh = None
+
+    def start_uevent_listener(self):
+        try:
+            self.uevent_socket = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+            self.uevent_socket.bind((0, UEVENT_KERNEL_GROUP))
+        except (OSError, AttributeError) as e:
+            # not fatal, the state is still refreshed every "ttl" seconds
+            print(f"[Warning] > power supply events unavailable, relying on polling only: {e}", file=sys.stderr)
+            self.uevent_socket = None
+            return
+        self.stop_pipe = os.pipe()
+        self.uevent_thread = threading.Thread(target=self.listen_uevents)
+        self.uevent_thread.daemon = True
+        self.uevent_thread.start()
+
+    def stop_uevent_listener(self):
+        if self.uevent_thread is None:
+            return
+        os.write(self.stop_pipe[1], b"\0")
+        self.uevent_thread.join()
+        self.uevent_thread = None
+
+    def listen_uevents(self):
+        try:
+            while True:
+                readable, _, _ = select.select([self.uevent_socket, self.stop_pipe[0]], [], [])
+                if self.stop_pipe[0] in readable:
+                    return
+                try:
+                    message = self.uevent_socket.recv(8192)
+                except OSError:
+                    return
+                if self.is_ac_change(message):
+                    self.refresh()
+        finally:
+            self.uevent_socket.close()
+            self.uevent_socket = None
+            for fd in self.stop_pipe:
+                os.close(fd)
+
+    # e.g. b"change@/devices/.../power_supply/ACAD\0ACTION=change\0SUBSYSTEM=power_supply\0POWER_SUPPLY_ONLINE=1\0...".
+    # the batteries report their capacity every few seconds, only a change of the online state of a mains (or USB)
+    # supply is worth asking framework_tool
+    def is_ac_change(self, message):
+        header, *lines = message.split(b"\0")
+        fields = dict(line.split(b"=", 1) for line in lines if b"=" in line)
+        if fields.get(b"SUBSYSTEM") != b"power_supply" or b"POWER_SUPPLY_ONLINE" not in fields:
+            return False
+        if fields.get(b"POWER_SUPPLY_TYPE") == b"Battery":
+            return False
+        device = fields.get(b"DEVPATH", header)
+        online = fields[b"POWER_SUPPLY_ONLINE"]
+        if self.supply_online.get(device) == online:
+            return False
+        self.supply_online[device] = online
+        return True
@@ -0,0 +1,38 @@
+import functools
+from time import perf_counter
+
+from fw_fanctrl.StageStatistics import StageStatistics
+
+
+# times the stages of the service by replacing the methods of their instances with timed wrappers.
+# nothing is wrapped when the profiler is not used, so that it costs nothing when disabled.
+class Profiler:
+    stages = None
+
+    def __init__(self):
+        self.stages = {}
+
+    def instrument(self, instance, method_name, stage=None):
+        stage = stage or method_name
+        statistics = self.stages.setdefault(stage, StageStatistics())
+        method = getattr(instance, method_name)
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                statistics.record(perf_counter() - start)
+
+        setattr(instance, method_name, timed)
+
+    def get_statistics(self):
+        return {stage: statistics.get_statistics() for stage, statistics in self.stages.items()}
+
+    # a single line, e.g. for a periodic log
+    def format_statistics(self):
+        return " | ".join(
+            f"{stage}: p50 {s['p50Ms']}ms p99 {s['p99Ms']}ms max {s['maxMs']}ms ({s['count']})"
+            for stage, s in self.get_statistics().items()
+        )
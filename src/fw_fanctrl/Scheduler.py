@@ -0,0 +1,76 @@
+import threading
+from time import monotonic
+
+
+# keeps named deadlines on the monotonic clock (or the given one) and sleeps until the earliest one, or until woken up.
+# periodic tasks are re-scheduled from their previous deadline rather than from the current time, so they do not drift.
+class Scheduler:
+    jitter_count = 0
+    jitter_total = 0
+    jitter_max = 0
+    jitter_last = 0
+    wakeups = 0
+    started_at = None
+    clock = None
+
+    def __init__(self, clock=monotonic):
+        self.clock = clock
+        self.deadlines = {}
+        self.lock = threading.Lock()
+        self.wake_event = threading.Event()
+        self.started_at = self.clock()
+
+    def schedule(self, name, deadline=None):
+        with self.lock:
+            self.deadlines[name] = self.clock() if deadline is None else deadline
+
+    def unschedule(self, name):
+        with self.lock:
+            self.deadlines.pop(name, None)
+
+    # the earliest deadline, None if nothing is scheduled
+    def get_next_deadline(self):
+        with self.lock:
+            return min(self.deadlines.values(), default=None)
+
+    def is_due(self, name, now):
+        deadline = self.deadlines.get(name)
+        return deadline is not None and deadline <= now
+
+    def advance(self, name, period, now):
+        with self.lock:
+            deadline = self.deadlines.get(name, now) + period
+            # when late by more than a period (e.g. after a slow hardware call), skip the missed occurrences
+            self.deadlines[name] = deadline if deadline > now else now + period
+
+    def wake(self):
+        self.wake_event.set()
+
+    # waits for the earliest deadline, or indefinitely when "idle" is set, unless woken up in the meantime
+    def wait(self, idle=False):
+        with self.lock:
+            deadline = None if idle or len(self.deadlines) == 0 else min(self.deadlines.values())
+        timeout = None if deadline is None else deadline - self.clock()
+        if timeout is None or timeout > 0:
+            woken = self.wake_event.wait(timeout)
+        else:
+            woken = self.wake_event.is_set()
+        self.wake_event.clear()
+        self.wakeups += 1
+        if not woken and deadline is not None:
+            self.record_jitter(self.clock() - deadline)
+
+    def record_jitter(self, jitter):
+        self.jitter_last = jitter
+        self.jitter_count += 1
+        self.jitter_total += jitter
+        self.jitter_max = max(self.jitter_max, jitter)
+
+    def get_statistics(self):
+        elapsed = self.clock() - self.started_at
+        return {
+            "jitterLastMs": round(self.jitter_last * 1000, 3),
+            "jitterMeanMs": round(self.jitter_total / self.jitter_count * 1000, 3) if self.jitter_count > 0 else 0,
+            "jitterMaxMs": round(self.jitter_max * 1000, 3),
+            "wakeupsPerSecond": round(self.wakeups / elapsed, 3) if elapsed > 0 else 0,
+        }
@@ -0,0 +1,28 @@
+from bisect import bisect_left
+
+
+# a speed curve precomputed as parallel arrays sorted by temperature, so that it can be evaluated with a binary search
+class SpeedCurve:
+    temperatures = None
+    speeds = None
+    slopes = None
+
+    def __init__(self, points):
+        points = sorted(points, key=lambda point: point["temp"])
+        self.temperatures = [point["temp"] for point in points]
+        self.speeds = [point["speed"] for point in points]
+        self.slopes = []
+        for i in range(len(points) - 1):
+            temperature_delta = self.temperatures[i + 1] - self.temperatures[i]
+            speed_delta = self.speeds[i + 1] - self.speeds[i]
+            # points sharing the same temperature are never interpolated between
+            self.slopes.append(speed_delta / temperature_delta if temperature_delta != 0 else 0)
+
+    def get_speed(self, temperature):
+        # index of the first point whose temperature is greater or equal to the given one
+        i = bisect_left(self.temperatures, temperature)
+        if i == 0:
+            return self.speeds[0]
+        if i == len(self.temperatures):
+            return self.speeds[-1]
+        return int(self.speeds[i - 1] + (temperature - self.temperatures[i - 1]) * self.slopes[i - 1])
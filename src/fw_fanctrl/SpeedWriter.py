@@ -0,0 +1,158 @@
+import sys
+import threading
+from time import monotonic
+
+from fw_fanctrl.LatencyHistogram import LatencyHistogram
+from fw_fanctrl.StageStatistics import StageStatistics
+
+
+# writes the fan speeds from its own thread, so that a slow EC never delays the control loop.
+# only the newest speed of each fan is kept, a speed replaced before being written is dropped.
+# with a "max_ramp", the writer walks toward the newest speed in steps of at most "max_ramp" percent per second.
+class SpeedWriter:
+    hardware_controller = None
+    # in percent per second, None for no limit
+    max_ramp = None
+    # the interval (in seconds) between two steps of a ramp
+    ramp_interval = 1
+    # the newest speed not written yet of each fan (None for all of them), with the time it was submitted,
+    # None once its queue latency was measured
+    pending = None
+    # the latest speed written to each fan (None for all of them), with the time it was written
+    written = None
+    dropped = 0
+    failed = 0
+    # from the submission of a speed to its (first) write
+    queue_latency = None
+    queue_latency_histogram = None
+    stopped = False
+    clock = None
+    # None until started, the speeds are then only written through "write_due"
+    thread = None
+
+    def __init__(self, hardware_controller, max_ramp=None, ramp_interval=1, clock=monotonic):
+        self.hardware_controller = hardware_controller
+        self.max_ramp = max_ramp
+        self.ramp_interval = ramp_interval
+        self.clock = clock
+        self.pending = {}
+        self.written = {}
+        self.queue_latency = StageStatistics()
+        self.queue_latency_histogram = LatencyHistogram()
+        self.condition = threading.Condition()
+        # held during a write, so that a cancellation can wait for the write in progress
+        self.write_lock = threading.Lock()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+
+    # hands the speed of a fan (None for all of them) over to the writer thread, without blocking
+    def submit(self, speed, index=None):
+        with self.condition:
+            if index is None:
+                # setting all the fans supersedes any pending speed
+                self.dropped += len(self.pending)
+                self.pending.clear()
+            elif index in self.pending:
+                self.dropped += 1
+            self.pending[index] = (speed, self.clock())
+            self.condition.notify()
+
+    # drops the pending speeds and waits for the write in progress, e.g. before handing the fans back to the EC.
+    # the EC then drives the fans, a later ramp no longer starts from the speeds written before
+    def cancel(self):
+        with self.write_lock:
+            with self.condition:
+                self.pending.clear()
+                self.written = {}
+
+    def get_last_write(self, index):
+        return self.written.get(index, self.written.get(None))
+
+    # a ramping fan is only written again once "ramp_interval" has elapsed since its last write
+    def get_next_write_time(self, index):
+        last_write = self.get_last_write(index)
+        if self.max_ramp is None or last_write is None:
+            return 0
+        return last_write[1] + self.ramp_interval
+
+    def get_ramped_speed(self, index, target, now):
+        last_write = self.get_last_write(index)
+        if self.max_ramp is None or last_write is None:
+            return target
+        speed, written_at = last_write
+        step = max(1, round(self.max_ramp * min(now - written_at, self.ramp_interval)))
+        return max(speed - step, min(speed + step, target))
+
+    def run(self):
+        while True:
+            with self.condition:
+                if self.stopped:
+                    return
+                now = self.clock()
+                next_write_time = min((self.get_next_write_time(index) for index in self.pending), default=None)
+                if next_write_time is None or next_write_time > now:
+                    self.condition.wait(None if next_write_time is None else next_write_time - now)
+                    continue
+            self.write_next()
+
+    # writes the speeds due from the calling thread, for a writer not started (e.g. on a simulated clock, which the
+    # writer thread could not wait for)
+    def write_due(self):
+        while self.write_next():
+            pass
+
+    # returns whether a speed was written
+    def write_next(self):
+        with self.write_lock:
+            with self.condition:
+                now = self.clock()
+                index = next((i for i in self.pending if self.get_next_write_time(i) <= now), False)
+                # cancelled in the meantime
+                if index is False:
+                    return False
+                target, submitted_at = self.pending.pop(index)
+                speed = self.get_ramped_speed(index, target, now)
+                # still ramping, it goes after the other pending fans
+                if speed != target:
+                    self.pending[index] = (target, None)
+            if submitted_at is not None:
+                self.queue_latency.record(now - submitted_at)
+                self.queue_latency_histogram.observe(now - submitted_at)
+            try:
+                if index is None:
+                    self.hardware_controller.set_speed(speed)
+                else:
+                    self.hardware_controller.set_fan_speed(index, speed)
+            except Exception as e:
+                # the next speed update submits a new speed anyway
+                self.failed += 1
+                print(f"[Error] > fan speed write failed: {e}", file=sys.stderr)
+            with self.condition:
+                if index is None:
+                    self.written = {None: (speed, self.clock())}
+                else:
+                    self.written[index] = (speed, self.clock())
+            return True
+
+    def get_statistics(self):
+        latency = self.queue_latency.get_statistics()
+        with self.condition:
+            pending = len(self.pending)
+        return {
+            "pending": pending,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "queueLatencyP50Ms": latency["p50Ms"],
+            "queueLatencyP99Ms": latency["p99Ms"],
+            "queueLatencyMaxMs": latency["maxMs"],
+        }
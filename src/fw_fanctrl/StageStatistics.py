@@ -0,0 +1,41 @@
+import threading
+from array import array
+
+
+# durations of the latest calls of a stage, in a fixed-size ring, the percentiles being computed on demand
+class StageStatistics:
+    capacity = None
+    count = 0
+    total = 0
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.durations = array("d", bytes(8 * capacity))
+        self.lock = threading.Lock()
+
+    def record(self, duration):
+        with self.lock:
+            self.durations[self.count % self.capacity] = duration
+            self.count += 1
+            self.total += duration
+
+    # in milliseconds, the percentiles and maximum covering the latest "capacity" calls
+    def get_statistics(self):
+        with self.lock:
+            durations = sorted(self.durations[: min(self.count, self.capacity)])
+            count = self.count
+            total = self.total
+        if len(durations) == 0:
+            return {"count": 0, "meanMs": 0, "p50Ms": 0, "p90Ms": 0, "p99Ms": 0, "maxMs": 0}
+
+        def percentile(p):
+            return round(durations[min(len(durations) - 1, int(p / 100 * len(durations)))] * 1000, 3)
+
+        return {
+            "count": count,
+            "meanMs": round(total / count * 1000, 3),
+            "p50Ms": percentile(50),
+            "p90Ms": percentile(90),
+            "p99Ms": percentile(99),
+            "maxMs": round(durations[-1] * 1000, 3),
+        }
@@ -0,0 +1,46 @@
+import json
+import os
+import sys
+import time
+
+from fw_fanctrl.AtomicFile import write_atomically
+
+VERSION = 1
+
+
+# keeps the state of the controller (recent temperatures, overwritten strategy, fan speed...) across restarts,
+# so that a restarted service goes on with a valid moving average instead of a single sample.
+# the state is only loaded if it was saved less than "max_age" seconds ago, older temperatures no longer tell anything.
+class StateFile:
+    path = None
+    max_age = None
+
+    def __init__(self, path, max_age=120):
+        self.path = path
+        self.max_age = max_age
+
+    def save(self, state):
+        content = json.dumps({"version": VERSION, "savedAt": time.time(), **state}, separators=(",", ":"))
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            write_atomically(self.path, content)
+        except OSError as e:
+            # not fatal, the next start is only a cold one
+            print(f"[Warning] > could not save the state to '{self.path}': {e}", file=sys.stderr)
+
+    # the saved state, None if there is none, or if it is too old or unreadable
+    def load(self):
+        try:
+            with open(self.path, "r") as fp:
+                state = json.load(fp)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"[Warning] > ignoring the saved state '{self.path}': {e}", file=sys.stderr)
+            return None
+        if not isinstance(state, dict) or state.get("version") != VERSION:
+            return None
+        age = time.time() - state.get("savedAt", 0)
+        if age < 0 or age > self.max_age:
+            return None
+        return state
@@ -1,15 +1,127 @@
+from fw_fanctrl.SpeedCurve import SpeedCurve
+
+CURVE = "curve"
+PID = "pid"
+
+
 class Strategy:
     name = None
     fan_speed_update_frequency = None
     moving_average_interval = None
+    moving_average_filter = None
+    control_mode = CURVE
     speed_curve = None
+    curve = None
+    target_temperature = None
+    proportional_gain = 5
+    integral_gain = 0.1
+    derivative_gain = 0
+    min_speed = 0
+    max_speed = 100
+    # in percent per second, None for no limit
+    max_speed_change = None
+    # (name, weight, curve or None) of each sensor, None to use the hottest one
+    sensors = None
+    # (sensor names, curve) of each fan, in the order of the hardware fans, None to drive them all together
+    fans = None
+    # the sensors of all the fans, to filter each of them once per update
+    fan_sensor_names = None
+    # the minimum speed applied while the CPU load is sustained, None without feed-forward
+    feed_forward_speed = None
+    # in percent, the CPU load being the highest of the utilisation and pressure
+    load_threshold = 70
+    # in seconds, how long the CPU load must stay above the threshold
+    sustained_for = 3
+    suppress_writes = False
+    speed_deadband = 0
+    rising_hysteresis = 0
+    falling_hysteresis = 0
+    forced_refresh_interval = 60
 
     def __init__(self, name, parameters):
         self.name = name
-        self.fan_speed_update_frequency = parameters["fanSpeedUpdateFrequency"]
+        self.fan_speed_update_frequency = parameters.get("fanSpeedUpdateFrequency")
         if self.fan_speed_update_frequency is None or self.fan_speed_update_frequency == "":
             self.fan_speed_update_frequency = 5
-        self.moving_average_interval = parameters["movingAverageInterval"]
+        self.moving_average_interval = parameters.get("movingAverageInterval")
         if self.moving_average_interval is None or self.moving_average_interval == "":
             self.moving_average_interval = 20
-        self.speed_curve = parameters["speedCurve"]
+        self.moving_average_filter = parameters.get("movingAverageFilter", "simple")
+        self.control_mode = parameters.get("controlMode", CURVE)
+        self.speed_curve = parameters.get("speedCurve")
+        if self.speed_curve is not None:
+            self.compile_speed_curve()
+        pid = parameters.get("pid")
+        if pid is not None:
+            self.target_temperature = pid["targetTemperature"]
+            self.proportional_gain = pid.get("proportionalGain", 5)
+            self.integral_gain = pid.get("integralGain", 0.1)
+            self.derivative_gain = pid.get("derivativeGain", 0)
+            self.min_speed = pid.get("minSpeed", 0)
+            self.max_speed = pid.get("maxSpeed", 100)
+            self.max_speed_change = pid.get("maxSpeedChange")
+        sensors = parameters.get("sensors")
+        if sensors is not None:
+            self.sensors = [
+                (
+                    sensor_name,
+                    sensor.get("weight", 1),
+                    SpeedCurve(sensor["speedCurve"]) if "speedCurve" in sensor else None,
+                )
+                for sensor_name, sensor in sensors.items()
+            ]
+        fans = parameters.get("fans")
+        if fans is not None:
+            self.fans = [(fan["sensors"], SpeedCurve(fan["speedCurve"])) for fan in fans]
+            self.fan_sensor_names = list(dict.fromkeys(name for names, _ in self.fans for name in names))
+        feed_forward = parameters.get("feedForward")
+        if feed_forward is not None:
+            self.feed_forward_speed = feed_forward["speed"]
+            self.load_threshold = feed_forward.get("loadThreshold", 70)
+            self.sustained_for = feed_forward.get("sustainedFor", 3)
+        write_suppression = parameters.get("writeSuppression")
+        if write_suppression is not None:
+            self.suppress_writes = True
+            self.speed_deadband = write_suppression.get("deadband", 0)
+            self.rising_hysteresis = write_suppression.get("risingHysteresis", 0)
+            self.falling_hysteresis = write_suppression.get("fallingHysteresis", 0)
+            self.forced_refresh_interval = write_suppression.get("forcedRefreshInterval", 60)
+
+    def compile_speed_curve(self):
+        self.curve = SpeedCurve(self.speed_curve)
+
+    def get_speed(self, temperature):
+        return self.curve.get_speed(temperature)
+
+    # combines the (already filtered) temperatures of the strategy sensors in a single pass.
+    # returns the weighted temperature (None without weighted sensor), then the highest speed asked by the sensor curves
+    # and the temperature of the corresponding sensor (None, None without sensor curve)
+    def combine_sensors(self, temperatures):
+        weighted_sum = 0
+        total_weight = 0
+        sensors_speed = None
+        sensors_temperature = None
+        for name, weight, curve in self.sensors:
+            temperature = temperatures.get(name)
+            if temperature is None:
+                continue
+            if weight > 0:
+                weighted_sum += weight * temperature
+                total_weight += weight
+            if curve is not None:
+                speed = curve.get_speed(temperature)
+                if sensors_speed is None or speed > sensors_speed:
+                    sensors_speed = speed
+                    sensors_temperature = temperature
+        weighted_temperature = float(round(weighted_sum / total_weight, 2)) if total_weight > 0 else None
+        return weighted_temperature, sensors_speed, sensors_temperature
+
+    # the (temperature, speed) of each fan, from the hottest (already filtered) temperature of its sensors.
+    # a fan whose sensors are all unavailable follows the given fallback temperature
+    def get_fan_speeds(self, temperatures, fallback_temperature):
+        fan_speeds = []
+        for names, curve in self.fans:
+            temperature = max((temperatures[name] for name in names if name in temperatures), default=None)
+            temperature = fallback_temperature if temperature is None else float(round(temperature, 2))
+            fan_speeds.append((temperature, curve.get_speed(temperature)))
+        return fan_speeds
@@ -0,0 +1,24 @@
+import queue
+import signal
+import threading
+
+from fw_fanctrl import PAUSE_SIGNAL, RESUME_SIGNAL
+
+# the suspend signals received and not handled yet, in order
+received = queue.SimpleQueue()
+
+
+# the handler (run by the main thread) only queues the signal, a thread of the service acts on it.
+# unlike a blocked signal mask, the handlers are not inherited by the processes spawned (e.g. framework_tool)
+def queue_signal(signum, frame):
+    received.put(signum)
+
+
+# until the service takes them from the queue, the suspend signals wait there instead of killing the process.
+# the handlers can only be installed from the main thread, does nothing elsewhere
+def install_handlers():
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(PAUSE_SIGNAL, queue_signal)
+    signal.signal(RESUME_SIGNAL, queue_signal)
+    return True
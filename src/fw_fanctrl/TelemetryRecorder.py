@@ -0,0 +1,151 @@
+import mmap
+import os
+import struct
+
+MAGIC = b"FWFH"
+VERSION = 1
+# magic, version, record size, capacity, number of records written since the file creation
+HEADER = struct.Struct("<4sHHIQ")
+NAME_SIZE = 32
+SENSOR_SLOTS = 16
+STRATEGY_SLOTS = 32
+NAMES_OFFSET = HEADER.size
+RECORDS_OFFSET = 4096
+# timestamp, effective temperature (hundredths of a degree), speed, strategy id, flags, then the temperature
+# (hundredths of a degree) of each sensor slot
+RECORD = struct.Struct(f"<dhBBB{SENSOR_SLOTS}h")
+MISSING_TEMPERATURE = -32768
+UNKNOWN_STRATEGY = 255
+FLAG_ON_AC = 1
+FLAG_ACTIVE = 2
+
+
+# appends fixed-width telemetry records to a memory-mapped ring file, overwriting the oldest ones once full.
+# writing a record is a memory copy, the kernel flushes the pages to the file on its own.
+# the sensor and strategy names are stored once in the header, the records refer to them by index.
+class TelemetryRecorder:
+    path = None
+    capacity = None
+    count = 0
+    file = None
+    map = None
+    sensor_names = None
+    strategy_names = None
+
+    def __init__(self, path, capacity=86400):
+        self.path = path
+        self.capacity = capacity
+        self.open()
+
+    def open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        size = RECORDS_OFFSET + RECORD.size * self.capacity
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.file = os.fdopen(fd, "r+b")
+        header = self.file.read(HEADER.size)
+        reuse = False
+        if len(header) == HEADER.size:
+            magic, version, record_size, capacity, count = HEADER.unpack(header)
+            # the history of the previous runs is kept, as long as it has the same layout
+            reuse = (magic, version, record_size, capacity) == (MAGIC, VERSION, RECORD.size, self.capacity)
+        if not reuse:
+            self.file.truncate(0)
+            count = 0
+        self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), size)
+        self.count = count
+        if reuse:
+            self.sensor_names, self.strategy_names = self.read_names(self.map)
+        else:
+            self.sensor_names = []
+            self.strategy_names = []
+            HEADER.pack_into(self.map, 0, MAGIC, VERSION, RECORD.size, self.capacity, 0)
+
+    def close(self):
+        if self.map is not None:
+            self.map.flush()
+            self.map.close()
+            self.map = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    @staticmethod
+    def read_names(buffer):
+        names = []
+        for slot in range(SENSOR_SLOTS + STRATEGY_SLOTS):
+            offset = NAMES_OFFSET + slot * NAME_SIZE
+            names.append(bytes(buffer[offset : offset + NAME_SIZE]).rstrip(b"\0").decode("utf-8", "replace"))
+        sensor_names = [name for name in names[:SENSOR_SLOTS] if name != ""]
+        strategy_names = [name for name in names[SENSOR_SLOTS:] if name != ""]
+        return sensor_names, strategy_names
+
+    # returns the slot of the name, registering it if there is still room, None otherwise
+    def get_slot(self, names, name, slots, first_slot):
+        if name in names:
+            return names.index(name)
+        if len(names) >= slots:
+            return None
+        offset = NAMES_OFFSET + (first_slot + len(names)) * NAME_SIZE
+        self.map[offset : offset + NAME_SIZE] = name.encode("utf-8")[:NAME_SIZE].ljust(NAME_SIZE, b"\0")
+        names.append(name)
+        return len(names) - 1
+
+    # a bogus reading must not stop the control loop, it is recorded as missing
+    @staticmethod
+    def encode_temperature(temperature):
+        if temperature is None:
+            return MISSING_TEMPERATURE
+        value = round(temperature * 100)
+        return value if MISSING_TEMPERATURE < value <= 32767 else MISSING_TEMPERATURE
+
+    def record(self, timestamp, temperatures, effective_temperature, speed, strategy_name, on_ac, active):
+        sensors = [MISSING_TEMPERATURE] * SENSOR_SLOTS
+        for name, temperature in temperatures.items():
+            slot = self.get_slot(self.sensor_names, name, SENSOR_SLOTS, 0)
+            if slot is not None:
+                sensors[slot] = self.encode_temperature(temperature)
+        strategy_id = self.get_slot(self.strategy_names, strategy_name, STRATEGY_SLOTS, SENSOR_SLOTS)
+        RECORD.pack_into(
+            self.map,
+            RECORDS_OFFSET + (self.count % self.capacity) * RECORD.size,
+            timestamp,
+            self.encode_temperature(effective_temperature),
+            max(0, min(255, round(speed))),
+            UNKNOWN_STRATEGY if strategy_id is None else strategy_id,
+            (FLAG_ON_AC if on_ac else 0) | (FLAG_ACTIVE if active else 0),
+            *sensors,
+        )
+        self.count += 1
+        # the record count is updated last, so that readers never see a partially written record as valid
+        struct.pack_into("<Q", self.map, HEADER.size - 8, self.count)
+
+    # yields the records of a history file, from the oldest to the latest, as dictionaries
+    @staticmethod
+    def read(path, since=None):
+        with open(path, "rb") as fp:
+            # a copy, the service may keep writing meanwhile
+            buffer = fp.read()
+        if len(buffer) < RECORDS_OFFSET:
+            raise ValueError(f"'{path}' is not a history file")
+        magic, version, record_size, capacity, count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"'{path}' is not a supported history file")
+        sensor_names, strategy_names = TelemetryRecorder.read_names(buffer)
+        for index in range(max(0, count - capacity), count):
+            timestamp, effective, speed, strategy_id, flags, *sensors = RECORD.unpack_from(
+                buffer, RECORDS_OFFSET + (index % capacity) * record_size
+            )
+            if since is not None and timestamp < since:
+                continue
+            record = {
+                "timestamp": timestamp,
+                "strategy": strategy_names[strategy_id] if strategy_id < len(strategy_names) else None,
+                "speed": speed,
+                "effectiveTemperature": effective / 100 if effective != MISSING_TEMPERATURE else None,
+                "onAc": bool(flags & FLAG_ON_AC),
+                "active": bool(flags & FLAG_ACTIVE),
+            }
+            for name, temperature in zip(sensor_names, sensors):
+                record[name] = temperature / 100 if temperature != MISSING_TEMPERATURE else None
+            yield record
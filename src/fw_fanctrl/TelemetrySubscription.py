@@ -0,0 +1,67 @@
+import sys
+import threading
+from time import monotonic
+
+TELEMETRY_FIELDS = [
+    "timestamp",
+    "strategy",
+    "default",
+    "speed",
+    "speeds",
+    "temperature",
+    "movingAverageTemperature",
+    "effectiveTemperature",
+    "active",
+]
+
+
+# receives the telemetry records published by the control loop, keeping only the latest one not consumed yet,
+# so that a slow client never delays the loop nor accumulates stale records
+class TelemetrySubscription:
+    fields = None
+    min_interval = 0
+    closed = False
+    # called (from the control loop thread) whenever a new record is available
+    listener = None
+
+    def __init__(self, fields=None, min_interval=0, on_close=None):
+        self.fields = fields
+        self.min_interval = min_interval
+        self.on_close = on_close
+        self.condition = threading.Condition()
+        self.pending = None
+        self.last_accepted = None
+
+    def push(self, record):
+        now = monotonic()
+        if self.last_accepted is not None and now - self.last_accepted < self.min_interval:
+            return
+        self.last_accepted = now
+        if self.fields is not None:
+            record = {field: record[field] for field in self.fields}
+        with self.condition:
+            self.pending = record
+            self.condition.notify_all()
+        if self.listener is not None:
+            try:
+                self.listener()
+            except Exception as e:
+                # e.g. the event loop of the client was closed, the control loop must go on without it
+                print(f"[Warning] > dropping a telemetry subscription: {e}", file=sys.stderr)
+                self.close()
+
+    # returns the latest record, waiting up to "timeout" seconds for one (forever if None), or None if there is none
+    def get(self, timeout=None):
+        with self.condition:
+            if self.pending is None and not self.closed:
+                self.condition.wait(timeout)
+            record = self.pending
+            self.pending = None
+            return record
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        if self.on_close is not None:
+            self.on_close(self)
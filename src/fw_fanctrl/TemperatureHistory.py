@@ -0,0 +1,110 @@
+import threading
+from array import array
+from bisect import bisect_left, insort
+
+SIMPLE = "simple"
+EXPONENTIAL = "exponential"
+MEDIAN = "median"
+
+
+# fixed-size ring buffer of the latest temperatures, maintaining every requested moving filter incrementally,
+# so that reading a filtered temperature is O(1) whatever the interval.
+# temperatures are stored in hundredths of a degree, so that the running sums stay exact.
+# the control loop appends while the socket commands read (and may register new windows), hence the lock.
+class TemperatureHistory:
+    capacity = None
+    count = 0
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.values = array("q", bytes(8 * capacity))
+        self.count = 0
+        self.windows = {}
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def clear(self):
+        with self.lock:
+            self.count = 0
+            self.windows = {}
+
+    def get(self, age):
+        # the temperature appended "age" samples ago (0 being the latest one)
+        return self.values[(self.count - 1 - age) % self.capacity]
+
+    def latest(self, n):
+        with self.lock:
+            return [self.get(age) / 100 for age in reversed(range(min(n, len(self))))]
+
+    def grow(self, capacity):
+        with self.lock:
+            ordered = [self.get(age) for age in reversed(range(len(self)))]
+            self.values = array("q", bytes(8 * capacity))
+            self.values[: len(ordered)] = array("q", ordered)
+            self.capacity = capacity
+            self.count = len(ordered)
+
+    def append(self, temperature):
+        value = round(temperature * 100)
+        with self.lock:
+            self.append_value(value)
+
+    def append_value(self, value):
+        for (filter_type, interval), window in self.windows.items():
+            # the value leaving the window, if the window is full
+            leaving = self.get(interval - 1) if self.count >= interval else None
+            if filter_type == SIMPLE:
+                window[0] += value - (leaving or 0)
+            elif filter_type == EXPONENTIAL:
+                alpha = 2 / (interval + 1)
+                window[0] = value if self.count == 0 else window[0] + alpha * (value - window[0])
+            elif filter_type == MEDIAN:
+                if leaving is not None:
+                    del window[bisect_left(window, leaving)]
+                insort(window, value)
+        self.values[self.count % self.capacity] = value
+        self.count += 1
+
+    def register(self, interval, filter_type=SIMPLE):
+        with self.lock:
+            return self.register_window(interval, filter_type)
+
+    def register_window(self, interval, filter_type):
+        if interval > self.capacity:
+            self.grow(interval)
+        samples = [self.get(age) for age in reversed(range(min(interval, len(self))))]
+        if filter_type == SIMPLE:
+            window = [sum(samples)]
+        elif filter_type == EXPONENTIAL:
+            window = [samples[0] if len(samples) > 0 else 0]
+            alpha = 2 / (interval + 1)
+            for value in samples[1:]:
+                window[0] += alpha * (value - window[0])
+        elif filter_type == MEDIAN:
+            window = sorted(samples)
+        else:
+            raise ValueError(f"Unknown temperature filter: '{filter_type}'")
+        self.windows[(filter_type, interval)] = window
+        return window
+
+    # the interval is a number of samples, returns None when no temperature has been recorded yet
+    def get_filtered(self, interval, filter_type=SIMPLE):
+        with self.lock:
+            return self.get_filtered_value(interval, filter_type)
+
+    def get_filtered_value(self, interval, filter_type):
+        if self.count == 0:
+            return None
+        window = self.windows.get((filter_type, interval))
+        if window is None:
+            window = self.register_window(interval, filter_type)
+        if filter_type == SIMPLE:
+            return window[0] / min(self.count, interval) / 100
+        if filter_type == EXPONENTIAL:
+            return window[0] / 100
+        middle = len(window) // 2
+        if len(window) % 2 == 1:
+            return window[middle] / 100
+        return (window[middle - 1] + window[middle]) / 200
@@ -1,8 +1,22 @@
-import importlib.resources
 import os
-
-INTERNAL_RESOURCES_PATH = importlib.resources.files("fw_fanctrl").joinpath("_resources")
+import signal
 
 DEFAULT_CONFIGURATION_FILE_PATH = "/etc/fw-fanctrl/config.json"
 SOCKETS_FOLDER_PATH = "/run/fw-fanctrl"
 COMMANDS_SOCKET_FILE_PATH = os.path.join(SOCKETS_FOLDER_PATH, ".fw-fanctrl.commands.sock")
+HISTORY_FILE_PATH = os.path.join(SOCKETS_FOLDER_PATH, "history.bin")
+STATE_FILE_PATH = os.path.join(SOCKETS_FOLDER_PATH, "state.json")
+# pause and resume the service, e.g. from the sleep hook, without going through the socket
+PAUSE_SIGNAL = signal.SIGUSR1
+RESUME_SIGNAL = signal.SIGUSR2
+
+
+# INTERNAL_RESOURCES_PATH is resolved on first use, as importlib.resources is costly to import for the cli commands
+def __getattr__(name):
+    if name == "INTERNAL_RESOURCES_PATH":
+        import importlib.resources
+
+        global INTERNAL_RESOURCES_PATH
+        INTERNAL_RESOURCES_PATH = importlib.resources.files("fw_fanctrl").joinpath("_resources")
+        return INTERNAL_RESOURCES_PATH
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,15 +2,73 @@ import shlex
 import sys
 
 from fw_fanctrl.CommandParser import CommandParser
-from fw_fanctrl.FanController import FanController
+from fw_fanctrl.SuspendSignals import install_handlers
 from fw_fanctrl.dto.command_result.CommandResult import CommandResult
 from fw_fanctrl.enum.CommandStatus import CommandStatus
 from fw_fanctrl.enum.OutputFormat import OutputFormat
-from fw_fanctrl.hardwareController.FrameworkToolHardwareController import FrameworkToolHardwareController
-from fw_fanctrl.socketController.UnixSocketController import UnixSocketController
+
+
+# the controllers and the service stack are imported on demand, so that the cli commands, which only talk to the
+# service through its socket, do not pay for importing what they do not use (e.g. jsonschema or asyncio)
+def get_socket_controller(name):
+    if name == "unix_async":
+        from fw_fanctrl.socketController.AsyncUnixSocketController import AsyncUnixSocketController
+
+        return AsyncUnixSocketController()
+    from fw_fanctrl.socketController.UnixSocketController import UnixSocketController
+
+    return UnixSocketController()
+
+
+def get_hardware_controller(name):
+    if name == "framework_tool_persistent":
+        from fw_fanctrl.hardwareController.PersistentFrameworkToolHardwareController import (
+            PersistentFrameworkToolHardwareController,
+        )
+
+        return PersistentFrameworkToolHardwareController()
+    if name == "sysfs":
+        from fw_fanctrl.hardwareController.SysfsHardwareController import SysfsHardwareController
+
+        return SysfsHardwareController()
+    from fw_fanctrl.hardwareController.FrameworkToolHardwareController import FrameworkToolHardwareController
+
+    return FrameworkToolHardwareController()
+
+
+# writes the records of the history file to stdout, as NDJSON with the JSON output format, as CSV otherwise.
+# the file is read directly, so that the history stays available when the service is stopped
+def export_history(args):
+    import csv
+    import json
+    import time
+
+    from fw_fanctrl.TelemetryRecorder import TelemetryRecorder
+
+    since = time.time() - args.since if args.since is not None else None
+    try:
+        records = TelemetryRecorder.read(args.history_file, since)
+        if args.output_format == OutputFormat.JSON:
+            for record in records:
+                sys.stdout.write(json.dumps(record) + "\n")
+            return
+        writer = None
+        for record in records:
+            if writer is None:
+                writer = csv.DictWriter(sys.stdout, fieldnames=list(record.keys()), lineterminator="\n")
+                writer.writeheader()
+            writer.writerow(record)
+    except BrokenPipeError:
+        pass
+    except (OSError, ValueError) as e:
+        _cre = CommandResult(CommandStatus.ERROR, f"Could not read the history file: {e}")
+        print(_cre.to_output_format(args.output_format), file=sys.stderr)
+        exit(1)
 
 
 def main():
+    # first, so that a suspend signal received while the service starts is not lost
+    install_handlers()
     try:
         args = CommandParser().parse_args(shlex.split(shlex.join(sys.argv[1:])))
     except Exception as e:
@@ -18,14 +76,12 @@ def main():
         print(_cre.to_output_format(OutputFormat.NATURAL), file=sys.stderr)
         exit(1)
 
-    socket_controller = UnixSocketController()
-    if args.socket_controller == "unix":
-        socket_controller = UnixSocketController()
+    socket_controller = get_socket_controller(args.socket_controller)
 
     if args.command == "run":
-        hardware_controller = FrameworkToolHardwareController()
-        if args.hardware_controller == "framework_tool":
-            hardware_controller = FrameworkToolHardwareController()
+        from fw_fanctrl.FanController import FanController
+
+        hardware_controller = get_hardware_controller(args.hardware_controller)
 
         fan = FanController(
             hardware_controller=hardware_controller,
@@ -33,8 +89,36 @@ def main():
             config_path=args.config,
             strategy_name=args.strategy,
             output_format=getattr(args, "output_format", None),
+            power_state_ttl=getattr(args, "power_state_ttl", 30),
+            min_sampling_interval=getattr(args, "min_sampling_interval", 1),
+            max_sampling_interval=getattr(args, "max_sampling_interval", 1),
+            watch_config=getattr(args, "watch_config", False),
+            history_file=getattr(args, "history_file", None),
+            history_size=getattr(args, "history_size", 86400),
+            metrics_address=getattr(args, "metrics_address", None),
+            stats=getattr(args, "stats", False),
+            stats_interval=getattr(args, "stats_interval", None),
+            async_writes=getattr(args, "async_writes", False),
+            max_speed_ramp=getattr(args, "max_speed_ramp", None),
+            state_file=getattr(args, "state_file", None) or None,
+            state_max_age=getattr(args, "state_max_age", 120),
         )
         fan.run(debug=not args.silent)
+    elif args.command == "export":
+        export_history(args)
+    elif args.command == "watch":
+        try:
+            for record in socket_controller.stream_via_client_socket(shlex.join(sys.argv[1:])):
+                print(record, end="", flush=True)
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            if str(e).startswith("[Error] >"):
+                print(str(e), file=sys.stderr)
+            else:
+                _cre = CommandResult(CommandStatus.ERROR, str(e))
+                print(_cre.to_output_format(getattr(args, "output_format", None)), file=sys.stderr)
+            exit(1)
     else:
         try:
             command_result = socket_controller.send_via_client_socket(shlex.join(sys.argv[1:]))
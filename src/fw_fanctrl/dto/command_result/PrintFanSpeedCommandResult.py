@@ -3,9 +3,13 @@ from fw_fanctrl.enum.CommandStatus import CommandStatus
 
 
 class PrintFanSpeedCommandResult(CommandResult):
-    def __init__(self, speed):
+    def __init__(self, speed, speeds=None):
         super().__init__(CommandStatus.SUCCESS)
         self.speed = speed
+        self.speeds = speeds
 
     def __str__(self):
-        return f"Current fan speed: '{self.speed}%'"
+        if self.speeds is None:
+            return f"Current fan speed: '{self.speed}%'"
+        fans = ", ".join(f"fan {index}: {speed}%" for index, speed in enumerate(self.speeds))
+        return f"Current fan speed: '{self.speed}%' ({fans})"
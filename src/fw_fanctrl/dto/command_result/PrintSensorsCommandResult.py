@@ -0,0 +1,14 @@
+import os
+
+from fw_fanctrl.dto.command_result.CommandResult import CommandResult
+from fw_fanctrl.enum.CommandStatus import CommandStatus
+
+
+class PrintSensorsCommandResult(CommandResult):
+    def __init__(self, sensors):
+        super().__init__(CommandStatus.SUCCESS)
+        self.sensors = sensors
+
+    def __str__(self):
+        printable_list = os.linesep.join(f"- {name}: {temperature}°C" for name, temperature in self.sensors.items())
+        return f"Sensor list: {os.linesep}{printable_list}"
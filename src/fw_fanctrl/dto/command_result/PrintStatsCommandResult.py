@@ -0,0 +1,20 @@
+import os
+
+from fw_fanctrl.dto.command_result.CommandResult import CommandResult
+from fw_fanctrl.enum.CommandStatus import CommandStatus
+
+
+class PrintStatsCommandResult(CommandResult):
+    def __init__(self, stages):
+        super().__init__(CommandStatus.SUCCESS)
+        self.stages = stages
+
+    def __str__(self):
+        if self.stages is None:
+            return "Stage timings are disabled, run the service with '--stats' to enable them"
+        lines = [
+            f"- {stage}: p50 {s['p50Ms']}ms, p90 {s['p90Ms']}ms, p99 {s['p99Ms']}ms, max {s['maxMs']}ms, "
+            f"mean {s['meanMs']}ms over {s['count']} calls"
+            for stage, s in self.stages.items()
+        ]
+        return f"Stage timings: {os.linesep}" + os.linesep.join(lines)
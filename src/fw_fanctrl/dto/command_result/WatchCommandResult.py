@@ -0,0 +1,37 @@
+import json
+
+from fw_fanctrl.dto.command_result.CommandResult import CommandResult
+from fw_fanctrl.enum.CommandStatus import CommandStatus
+from fw_fanctrl.enum.OutputFormat import OutputFormat
+
+
+# a streaming result, the socket controller sends one formatted line per published telemetry record
+class WatchCommandResult(CommandResult):
+    def __init__(self, subscription, output_format):
+        super().__init__(CommandStatus.SUCCESS)
+        self.subscription = subscription
+        self.output_format = output_format
+
+    def format_record(self, record):
+        if self.output_format == OutputFormat.JSON:
+            return json.dumps(record) + "\n"
+        return ", ".join(f"{key}: {value}" for key, value in record.items()) + "\n"
+
+    # yields the formatted records until the subscription is closed, or until "is_alive" (checked every
+    # "poll_interval" seconds without a record, e.g. while the service is paused) tells the client went away
+    def stream(self, poll_interval=None, is_alive=None):
+        try:
+            while not self.subscription.closed:
+                record = self.subscription.get(poll_interval)
+                if record is not None:
+                    yield self.format_record(record)
+                elif is_alive is not None and not is_alive():
+                    return
+        finally:
+            self.subscription.close()
+
+    def to_output_format(self, output_format):
+        return str(self)
+
+    def __str__(self):
+        return "Watching..."
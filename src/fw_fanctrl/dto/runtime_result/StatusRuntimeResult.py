@@ -15,6 +15,15 @@ class StatusRuntimeResult(RuntimeResult):
         effective_temperature,
         active,
         configuration,
+        issued_speed_writes,
+        suppressed_speed_writes,
+        scheduler,
+        configuration_error=None,
+        speeds=None,
+        speed_writer=None,
+        resume_latency_ms=None,
+        cpu_load=None,
+        feed_forward_active=False,
     ):
         super().__init__(CommandStatus.SUCCESS)
         self.strategy = strategy
@@ -25,16 +34,49 @@ class StatusRuntimeResult(RuntimeResult):
         self.effectiveTemperature = effective_temperature
         self.active = active
         self.configuration = configuration
+        self.issuedSpeedWrites = issued_speed_writes
+        self.suppressedSpeedWrites = suppressed_speed_writes
+        self.scheduler = scheduler
+        self.configurationError = configuration_error
+        self.speeds = speeds
+        self.speedWriter = speed_writer
+        self.resumeLatencyMs = resume_latency_ms
+        self.cpuLoad = cpu_load
+        self.feedForwardActive = feed_forward_active
+
+    # the speed of each fan, only when they are driven separately
+    def format_speeds(self):
+        if self.speeds is None:
+            return ""
+        return "FanSpeeds: " + ", ".join(f"{speed}%" for speed in self.speeds) + os.linesep
 
     def __str__(self):
-        return (
+        status = (
             f"Strategy: '{self.strategy}'{os.linesep}"
             f"Default: {self.default}{os.linesep}"
             f"Speed: {self.speed}%{os.linesep}"
+            f"{self.format_speeds()}"
             f"Temp: {self.temperature}°C{os.linesep}"
             f"MovingAverageTemp: {self.movingAverageTemperature}°C{os.linesep}"
             f"EffectiveTemp: {self.effectiveTemperature}°C{os.linesep}"
             f"Active: {self.active}{os.linesep}"
+            f"SpeedWrites: {self.issuedSpeedWrites} issued, {self.suppressedSpeedWrites} suppressed{os.linesep}"
+            f"TickJitter: {self.scheduler["jitterMeanMs"]}ms mean, {self.scheduler["jitterMaxMs"]}ms max{os.linesep}"
+            f"Wakeups: {self.scheduler["wakeupsPerSecond"]}/s, sampling every {self.scheduler["samplingInterval"]}s{os.linesep}"
             f"DefaultStrategy: '{self.configuration["data"]["defaultStrategy"]}'{os.linesep}"
             f"DischargingStrategy: '{self.configuration["data"]["strategyOnDischarging"]}'{os.linesep}"
         )
+        if self.speedWriter is not None:
+            status += (
+                f"SpeedWriter: {self.speedWriter["dropped"]} dropped, {self.speedWriter["failed"]} failed, "
+                f"queue latency {self.speedWriter["queueLatencyP50Ms"]}ms p50, "
+                f"{self.speedWriter["queueLatencyMaxMs"]}ms max{os.linesep}"
+            )
+        if self.cpuLoad is not None:
+            feed_forward = "active" if self.feedForwardActive else "inactive"
+            status += f"CpuLoad: {self.cpuLoad}%, feed-forward {feed_forward}{os.linesep}"
+        if self.resumeLatencyMs is not None:
+            status += f"ResumeToFirstWrite: {self.resumeLatencyMs}ms{os.linesep}"
+        if self.configurationError is not None:
+            status += f"ConfigurationError: {self.configurationError}{os.linesep}"
+        return status
@@ -0,0 +1,2 @@
+class CoprocessException(Exception):
+    pass
@@ -0,0 +1,6 @@
+from fw_fanctrl.exception.CoprocessException import CoprocessException
+
+
+# the command was not sent, it can safely be run another way
+class CoprocessUnreachableException(CoprocessException):
+    pass
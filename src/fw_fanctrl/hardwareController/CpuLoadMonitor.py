@@ -0,0 +1,71 @@
+import os
+from time import monotonic
+
+
+# measures the CPU utilisation (from /proc/stat) and the CPU pressure (from /proc/pressure/cpu, PSI) between two calls.
+# the files are kept open and re-read in place, only the differences of their counters are computed.
+class CpuLoadMonitor:
+    stat_fd = None
+    pressure_fd = None
+    clock = None
+    # the counters of the previous call
+    last_busy = None
+    last_total = None
+    last_stall = None
+    last_time = None
+
+    def __init__(self, proc_root="/proc", clock=monotonic):
+        self.clock = clock
+        self.stat_fd = self.open(os.path.join(proc_root, "stat"))
+        # absent when the kernel is built or booted without PSI
+        self.pressure_fd = self.open(os.path.join(proc_root, "pressure/cpu"))
+
+    @staticmethod
+    def open(path):
+        try:
+            return os.open(path, os.O_RDONLY)
+        except OSError:
+            return None
+
+    def close(self):
+        for fd in (self.stat_fd, self.pressure_fd):
+            if fd is not None:
+                os.close(fd)
+        self.stat_fd = None
+        self.pressure_fd = None
+
+    # the busy and total times of all the CPUs, in clock ticks
+    def read_stat(self):
+        # e.g. "cpu  user nice system idle iowait irq softirq steal guest guest_nice", the guest times being already
+        # counted in the user ones
+        line = os.pread(self.stat_fd, 256, 0).split(b"\n", 1)[0]
+        values = [int(value) for value in line.split()[1:9]]
+        total = sum(values)
+        return total - values[3] - values[4], total
+
+    # the time (in microseconds) during which some tasks waited for a CPU, since the boot
+    def read_stall(self):
+        # e.g. "some avg10=1.52 avg60=0.87 avg300=0.25 total=34567890"
+        line = os.pread(self.pressure_fd, 256, 0).split(b"\n", 1)[0]
+        return int(line.rsplit(b"total=", 1)[1])
+
+    # the utilisation and pressure (fractions of the time) since the previous call, None on the first call
+    # or when /proc/stat cannot be read
+    def sample(self):
+        if self.stat_fd is None:
+            return None
+        now = self.clock()
+        try:
+            busy, total = self.read_stat()
+            stall = self.read_stall() if self.pressure_fd is not None else None
+        except (OSError, ValueError, IndexError):
+            return None
+        last_busy, last_total, last_stall, last_time = self.last_busy, self.last_total, self.last_stall, self.last_time
+        self.last_busy, self.last_total, self.last_stall, self.last_time = busy, total, stall, now
+        if last_time is None:
+            return None
+        utilisation = (busy - last_busy) / (total - last_total) if total > last_total else 0
+        pressure = 0
+        if stall is not None and last_stall is not None and now > last_time:
+            pressure = min(1, (stall - last_stall) / 1_000_000 / (now - last_time))
+        return utilisation, pressure
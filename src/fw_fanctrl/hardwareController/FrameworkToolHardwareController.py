@@ -4,38 +4,53 @@ from abc import ABC
 
 from fw_fanctrl.hardwareController.HardwareController import HardwareController
 
+THERMAL_LINE_PATTERN = re.compile(r"^\s*([^:\n]+?):\s*(\d+)\sC", re.MULTILINE)
+# e.g. "  Fan Speed:  1932 RPM", one line per fan
+FAN_LINE_PATTERN = re.compile(r"^\s*Fan Speed:", re.MULTILINE)
+
 
 class FrameworkToolHardwareController(HardwareController, ABC):
+    fan_count = None
 
-    def get_temperature(self):
-        raw_out = subprocess.run(
-            "framework_tool --thermal",
+    # a "timeout" (in seconds) raises subprocess.TimeoutExpired once elapsed, instead of waiting forever
+    def run_command(self, command, silence_stderr=False, timeout=None):
+        return subprocess.run(
+            command,
             stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL if silence_stderr else None,
             shell=True,
             text=True,
+            timeout=timeout,
         ).stdout
-        raw_temps = re.findall(r":\s*(\d+)\sC", raw_out)
-        temps = sorted([x for x in [int(x) for x in raw_temps] if x > 0], reverse=True)
-        # safety fallback to avoid damaging hardware
-        if len(temps) == 0:
-            return 50
-        return float(round(temps[0], 2))
+
+    def get_temperature(self):
+        return self.get_hottest(self.get_temperatures())
+
+    def get_temperatures(self):
+        raw_out = self.run_command("framework_tool --thermal")
+        # e.g. "  F75303_Local: 45 C" or "  dGPU temp: 60 C", absent or unpowered sensors have no temperature
+        raw_temps = THERMAL_LINE_PATTERN.findall(raw_out)
+        return {name: float(temp) for name, temp in raw_temps if int(temp) > 0}
 
     def set_speed(self, speed):
-        subprocess.run(f"framework_tool --fansetduty {speed}", stdout=subprocess.PIPE, shell=True)
+        self.run_command(f"framework_tool --fansetduty {speed}")
+
+    # the fans do not change, they are only counted once
+    def get_fan_count(self):
+        if self.fan_count is None:
+            raw_out = self.run_command("framework_tool --thermal")
+            self.fan_count = max(1, len(FAN_LINE_PATTERN.findall(raw_out)))
+        return self.fan_count
+
+    def set_fan_speed(self, index, speed):
+        self.run_command(f"framework_tool --fansetduty {index} {speed}")
 
     def is_on_ac(self):
-        raw_out = subprocess.run(
-            "framework_tool --power",
-            stdout=subprocess.PIPE,
-            stderr=subprocess.DEVNULL,
-            shell=True,
-            text=True,
-        ).stdout
+        raw_out = self.run_command("framework_tool --power", silence_stderr=True)
         return len(re.findall(r"AC\sis:\s*connected", raw_out)) > 0
 
     def pause(self):
-        subprocess.run("framework_tool --autofanctrl", stdout=subprocess.PIPE, shell=True)
+        self.run_command("framework_tool --autofanctrl")
 
     def resume(self):
         # Empty for framework_tool, as setting an arbitrary speed disables the automatic fan control
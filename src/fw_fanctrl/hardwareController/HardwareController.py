@@ -1,17 +1,44 @@
 from abc import ABC, abstractmethod
 
 from fw_fanctrl.exception.UnimplementedException import UnimplementedException
+from fw_fanctrl.hardwareController.CpuLoadMonitor import CpuLoadMonitor
 
 
 class HardwareController(ABC):
+    cpu_load_monitor = None
+
     @abstractmethod
     def get_temperature(self):
         raise UnimplementedException()
 
+    # the temperature of every sensor, by name. controllers unable to tell the sensors apart only report one
+    def get_temperatures(self):
+        return {"default": self.get_temperature()}
+
+    # the hottest of the given temperatures
+    @staticmethod
+    def get_hottest(temperatures):
+        # safety fallback to avoid damaging hardware
+        return float(round(max(temperatures.values(), default=50), 2))
+
     @abstractmethod
     def set_speed(self, speed):
         raise UnimplementedException()
 
+    # the number of fans the controller can drive separately
+    def get_fan_count(self):
+        return 1
+
+    # sets the speed of a single fan (from 0), controllers unable to drive the fans separately set them all
+    def set_fan_speed(self, index, speed):
+        self.set_speed(speed)
+
+    # the CPU utilisation and pressure (fractions of the time) since the previous call, None when unknown
+    def get_cpu_load(self):
+        if self.cpu_load_monitor is None:
+            self.cpu_load_monitor = CpuLoadMonitor()
+        return self.cpu_load_monitor.sample()
+
     @abstractmethod
     def pause(self):
         pass
@@ -0,0 +1,35 @@
+import sys
+from abc import ABC
+
+from fw_fanctrl.exception.CoprocessUnreachableException import CoprocessUnreachableException
+from fw_fanctrl.hardwareController.FrameworkToolHardwareController import FrameworkToolHardwareController
+from fw_fanctrl.hardwareController.ShellCoprocess import ShellCoprocess
+
+
+class PersistentFrameworkToolHardwareController(FrameworkToolHardwareController, ABC):
+    coprocess = None
+    # the speeds are written through a shell of their own, so that a slow write from the speed writer thread
+    # never holds the sampling of the temperatures behind it
+    write_coprocess = None
+
+    def __init__(self, timeout=5):
+        self.coprocess = ShellCoprocess(timeout=timeout)
+        self.write_coprocess = ShellCoprocess(timeout=timeout)
+
+    def run_command(self, command, silence_stderr=False):
+        return self.run_command_on(self.coprocess, command, silence_stderr)
+
+    def run_command_on(self, coprocess, command, silence_stderr=False):
+        try:
+            return coprocess.run(command, silence_stderr=silence_stderr)
+        except CoprocessUnreachableException as e:
+            # the coprocess is restarted on the next call, fall back to a one-shot call in the meantime.
+            # once sent (e.g. on a timeout), a command is never run again, a speed may already have reached the EC
+            print(f"[Warning] > {e}, falling back to a one-shot call", file=sys.stderr)
+            return super().run_command(command, silence_stderr=silence_stderr, timeout=coprocess.timeout)
+
+    def set_speed(self, speed):
+        self.run_command_on(self.write_coprocess, f"framework_tool --fansetduty {speed}")
+
+    def set_fan_speed(self, index, speed):
+        self.run_command_on(self.write_coprocess, f"framework_tool --fansetduty {index} {speed}")
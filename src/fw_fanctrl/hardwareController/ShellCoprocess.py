@@ -0,0 +1,79 @@
+import os
+import select
+import subprocess
+import threading
+import time
+import uuid
+
+from fw_fanctrl.exception.CoprocessException import CoprocessException
+from fw_fanctrl.exception.CoprocessUnreachableException import CoprocessUnreachableException
+
+
+# long-lived shell kept behind a pipe, commands are sent to it one at a time.
+# it saves forking the whole python process (and a new shell) for every call, only the command itself is spawned.
+class ShellCoprocess:
+    shell = None
+    timeout = None
+    restart_count = 0
+
+    def __init__(self, timeout=5, shell="/bin/sh"):
+        self.shell = shell
+        self.timeout = timeout
+        self.process = None
+        self.lock = threading.Lock()
+        # unique end-of-output marker, so that no command output can be mistaken for it
+        self.sentinel = f"__fw_fanctrl_end_{uuid.uuid4().hex}__"
+
+    def start(self):
+        if self.process is not None and self.process.poll() is None:
+            return
+        if self.process is not None:
+            self.restart_count += 1
+        self.process = subprocess.Popen(
+            [self.shell],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            bufsize=0,
+        )
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            self.process.kill()
+            self.process.wait()
+        except OSError:
+            pass
+        self.process = None
+
+    def run(self, command, silence_stderr=False):
+        with self.lock:
+            try:
+                self.start()
+            except OSError as e:
+                raise CoprocessUnreachableException(f"coprocess could not be started: {e}")
+            redirection = " 2>/dev/null" if silence_stderr else ""
+            request = f"{command}{redirection} </dev/null; printf '\\n%s\\n' '{self.sentinel}'\n"
+            try:
+                self.process.stdin.write(request.encode("utf-8"))
+            except (BrokenPipeError, OSError) as e:
+                self.stop()
+                raise CoprocessUnreachableException(f"coprocess is not reachable: {e}")
+            return self.read_until_sentinel()
+
+    def read_until_sentinel(self):
+        fd = self.process.stdout.fileno()
+        marker = f"\n{self.sentinel}\n".encode("utf-8")
+        deadline = time.monotonic() + self.timeout
+        output = b""
+        while not output.endswith(marker):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                self.stop()
+                raise CoprocessException(f"coprocess did not answer within {self.timeout}s")
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                self.stop()
+                raise CoprocessException("coprocess exited unexpectedly")
+            output += chunk
+        return output[: -len(marker)].decode("utf-8", errors="replace")
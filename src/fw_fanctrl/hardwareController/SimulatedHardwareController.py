@@ -0,0 +1,114 @@
+from fw_fanctrl.hardwareController.HardwareController import HardwareController
+
+
+# a laptop simulated by a first order thermal model, to run the service without the hardware (e.g. in benchmarks).
+# the heat load (in watts) follows the workload trace, one value per "period" seconds, the last one being held,
+# and the cooling grows with the (mean) fan speed. the simulated time only moves forward through "advance".
+class SimulatedHardwareController(HardwareController):
+    workload = None
+    period = 1
+    ambient = 25
+    # in J/°C
+    heat_capacity = 40
+    # in W/°C, fan stopped, and added at full fan speed
+    idle_conductance = 0.4
+    fan_conductance = 0.6
+    # the heat load (in watts) of a fully busy CPU
+    max_load = 60
+    # the offset (in °C) of each sensor from the simulated temperature
+    sensors = None
+    on_ac = True
+    time = 0
+    temperature = None
+    # the mean speed of the fans
+    speed = 0
+    fan_speeds = None
+    speed_writes = 0
+    paused = False
+
+    def __init__(
+        self,
+        workload,
+        period=1,
+        ambient=25,
+        heat_capacity=40,
+        idle_conductance=0.4,
+        fan_conductance=0.6,
+        sensors=None,
+        on_ac=True,
+        fan_count=1,
+        max_load=60,
+    ):
+        self.workload = workload
+        self.period = period
+        self.ambient = ambient
+        self.heat_capacity = heat_capacity
+        self.idle_conductance = idle_conductance
+        self.fan_conductance = fan_conductance
+        self.sensors = sensors if sensors is not None else {"APU": 0}
+        self.on_ac = on_ac
+        self.fan_speeds = [0] * fan_count
+        self.max_load = max_load
+        # starts at the steady temperature of the first load, fan stopped
+        self.temperature = ambient + workload[0] / idle_conductance
+
+    def get_time(self):
+        return self.time
+
+    def get_load(self, time):
+        return self.workload[min(int(time / self.period), len(self.workload) - 1)]
+
+    def get_conductance(self, speed):
+        return self.idle_conductance + self.fan_conductance * speed / 100
+
+    def get_next_temperature(self, temperature, load, speed, duration):
+        cooling = self.get_conductance(speed) * (temperature - self.ambient)
+        return temperature + duration * (load - cooling) / self.heat_capacity
+
+    # the heat load that explains a temperature change, e.g. to replay a recorded temperature trace
+    def get_load_from_temperatures(self, temperature, next_temperature, speed, duration):
+        return self.heat_capacity * (next_temperature - temperature) / duration + self.get_conductance(speed) * (
+            temperature - self.ambient
+        )
+
+    # moves the simulated time forward, in steps of at most "max_step" seconds
+    def advance(self, until, max_step=0.5):
+        while self.time < until:
+            duration = min(max_step, until - self.time)
+            self.temperature = self.get_next_temperature(
+                self.temperature, self.get_load(self.time), self.speed, duration
+            )
+            self.time += duration
+
+    def get_temperature(self):
+        return self.get_hottest(self.get_temperatures())
+
+    def get_temperatures(self):
+        # the embedded controller reports whole degrees
+        return {name: float(round(self.temperature + offset)) for name, offset in self.sensors.items()}
+
+    # the utilisation follows the heat load, the simulated CPU never has runnable tasks waiting
+    def get_cpu_load(self):
+        return min(1, max(0, self.get_load(self.time) / self.max_load)), 0
+
+    def set_speed(self, speed):
+        self.fan_speeds = [speed] * len(self.fan_speeds)
+        self.speed = speed
+        self.speed_writes += 1
+
+    def get_fan_count(self):
+        return len(self.fan_speeds)
+
+    def set_fan_speed(self, index, speed):
+        self.fan_speeds[index] = speed
+        self.speed = sum(self.fan_speeds) / len(self.fan_speeds)
+        self.speed_writes += 1
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def is_on_ac(self):
+        return self.on_ac
@@ -0,0 +1,109 @@
+import glob
+import os
+from abc import ABC
+
+from fw_fanctrl.hardwareController.FrameworkToolHardwareController import FrameworkToolHardwareController
+
+
+# reads the temperatures and power state from sysfs, the fan(s) are still driven through framework_tool.
+# the sysfs files are kept open and re-read in place, which costs microseconds instead of a process spawn.
+class SysfsHardwareController(FrameworkToolHardwareController, ABC):
+    sysfs_root = None
+    temperature_fds = None
+    temperature_names = None
+    power_supply_fds = None
+
+    def __init__(self, sysfs_root="/sys"):
+        self.sysfs_root = sysfs_root
+        self.temperature_fds = []
+        self.temperature_names = []
+        self.power_supply_fds = []
+        self.discover()
+
+    def discover(self):
+        self.close()
+        paths, self.temperature_fds = self.open_all(
+            os.path.join(self.sysfs_root, "class/hwmon/*/temp*_input"),
+            os.path.join(self.sysfs_root, "class/thermal/thermal_zone*/temp"),
+        )
+        self.temperature_names = []
+        for path in paths:
+            name = self.get_sensor_name(path)
+            # e.g. several "acpitz" thermal zones
+            unique_name = name
+            i = 1
+            while unique_name in self.temperature_names:
+                unique_name = f"{name}_{i}"
+                i += 1
+            self.temperature_names.append(unique_name)
+        _, self.power_supply_fds = self.open_all(os.path.join(self.sysfs_root, "class/power_supply/*/online"))
+
+    # "<hwmon name>_<label>" (e.g. "k10temp_Tctl") for hwmon sensors, "<type>" (e.g. "acpitz") for thermal zones
+    @staticmethod
+    def get_sensor_name(path):
+        directory, file_name = os.path.split(path)
+
+        def read_text(name):
+            try:
+                with open(os.path.join(directory, name), "r") as fp:
+                    return fp.read().strip()
+            except OSError:
+                return None
+
+        if file_name == "temp":
+            return read_text("type") or os.path.basename(directory)
+        sensor = file_name.removesuffix("_input")
+        device = read_text("name") or os.path.basename(directory)
+        label = read_text(sensor + "_label") or sensor
+        return f"{device}_{label}"
+
+    def close(self):
+        for fd in self.temperature_fds + self.power_supply_fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.temperature_fds = []
+        self.power_supply_fds = []
+
+    @staticmethod
+    def open_all(*patterns):
+        paths = []
+        fds = []
+        for pattern in patterns:
+            for path in sorted(glob.glob(pattern)):
+                try:
+                    fds.append(os.open(path, os.O_RDONLY))
+                    paths.append(path)
+                except OSError:
+                    pass
+        return paths, fds
+
+    # returns None for unreadable files (e.g. a sensor that is powered down)
+    @staticmethod
+    def read_int(fd):
+        try:
+            return int(os.pread(fd, 32, 0))
+        except (OSError, ValueError):
+            return None
+
+    # the values are in the same order as the fds, None for the unreadable ones
+    def read_all(self, fds):
+        values = [self.read_int(fd) for fd in fds]
+        if len(fds) > 0 and all(value is None for value in values):
+            # the devices may have been re-enumerated (e.g. after a resume), reopen them for the next call
+            self.discover()
+        return values
+
+    def get_temperatures(self):
+        names = self.temperature_names
+        values = self.read_all(self.temperature_fds)
+        # sysfs temperatures are in millidegree Celsius
+        return {name: x / 1000 for name, x in zip(names, values) if x is not None and x > 0}
+
+    def is_on_ac(self):
+        online = [x for x in self.read_all(self.power_supply_fds) if x is not None]
+        # without any external power supply (e.g. a desktop), consider the system as on AC
+        if len(online) == 0:
+            return True
+        return any(x == 1 for x in online)
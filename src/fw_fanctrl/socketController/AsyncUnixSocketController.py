@@ -0,0 +1,146 @@
+import asyncio
+import os
+import socket
+import struct
+from abc import ABC
+
+from fw_fanctrl import COMMANDS_SOCKET_FILE_PATH
+from fw_fanctrl.dto.command_result.WatchCommandResult import WatchCommandResult
+from fw_fanctrl.exception.SocketAlreadyRunningException import SocketAlreadyRunningException
+from fw_fanctrl.exception.SocketCallException import SocketCallException
+from fw_fanctrl.socketController.SocketController import SocketController
+
+# every message is prefixed by its length, as a 4 bytes big-endian unsigned integer
+MESSAGE_LENGTH_FORMAT = "!I"
+MESSAGE_LENGTH_SIZE = struct.calcsize(MESSAGE_LENGTH_FORMAT)
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+def frame_message(message):
+    payload = message.encode("utf-8")
+    return struct.pack(MESSAGE_LENGTH_FORMAT, len(payload)) + payload
+
+
+# serves any number of clients concurrently, with length-prefixed messages so that payloads of any size are read whole
+class AsyncUnixSocketController(SocketController, ABC):
+    server = None
+    loop = None
+    socket_path = None
+
+    def __init__(self, socket_path=COMMANDS_SOCKET_FILE_PATH):
+        self.socket_path = socket_path
+
+    def start_server_socket(self, command_callback=None):
+        if self.server:
+            raise SocketAlreadyRunningException(self.server)
+        asyncio.run(self.serve(command_callback))
+
+    async def serve(self, command_callback):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        if not os.path.exists(os.path.dirname(self.socket_path)):
+            os.makedirs(os.path.dirname(self.socket_path))
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_unix_server(
+            lambda reader, writer: self.handle_client(reader, writer, command_callback),
+            path=self.socket_path,
+        )
+        os.chmod(self.socket_path, 0o777)
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.server = None
+            self.loop = None
+
+    async def handle_client(self, reader, writer, command_callback):
+        try:
+            (length,) = struct.unpack(MESSAGE_LENGTH_FORMAT, await reader.readexactly(MESSAGE_LENGTH_SIZE))
+            if length > MAX_MESSAGE_SIZE:
+                raise SocketCallException(f"message too large ({length} bytes)")
+            data = (await reader.readexactly(length)).decode()
+            # commands may block on the hardware, run them outside the event loop so other clients are still served
+            response = await self.loop.run_in_executor(None, self.execute_command, data, command_callback)
+            if isinstance(response, WatchCommandResult):
+                await self.stream_to_client(reader, writer, response)
+                return
+            writer.write(frame_message(response))
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, SocketCallException):
+            pass
+        finally:
+            writer.close()
+
+    async def stream_to_client(self, reader, writer, watch_result):
+        subscription = watch_result.subscription
+        record_available = asyncio.Event()
+        subscription.listener = lambda: self.loop.call_soon_threadsafe(record_available.set)
+        # the client sends nothing more, reaching the end of its stream means it went away
+        disconnection = asyncio.ensure_future(reader.read())
+        try:
+            while not subscription.closed:
+                record_wait = asyncio.ensure_future(record_available.wait())
+                await asyncio.wait([record_wait, disconnection], return_when=asyncio.FIRST_COMPLETED)
+                if disconnection.done():
+                    record_wait.cancel()
+                    return
+                record_available.clear()
+                record = subscription.get(timeout=0)
+                if record is not None:
+                    writer.write(frame_message(watch_result.format_record(record)))
+                    await writer.drain()
+        finally:
+            disconnection.cancel()
+            subscription.close()
+
+    def stop_server_socket(self):
+        if self.server and self.loop:
+            self.loop.call_soon_threadsafe(self.server.close)
+
+    def is_server_socket_running(self):
+        return self.server is not None
+
+    def send_via_client_socket(self, command):
+        client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client_socket.connect(self.socket_path)
+            client_socket.sendall(frame_message(command))
+            (length,) = struct.unpack(MESSAGE_LENGTH_FORMAT, self.receive_exactly(client_socket, MESSAGE_LENGTH_SIZE))
+            data = self.receive_exactly(client_socket, length).decode()
+            if data.startswith("[Error] > "):
+                raise SocketCallException(data)
+            return data
+        finally:
+            if client_socket:
+                client_socket.close()
+
+    def stream_via_client_socket(self, command):
+        client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client_socket.connect(self.socket_path)
+            client_socket.sendall(frame_message(command))
+            while True:
+                try:
+                    header = self.receive_exactly(client_socket, MESSAGE_LENGTH_SIZE)
+                except SocketCallException:
+                    # the service closed the stream
+                    return
+                (length,) = struct.unpack(MESSAGE_LENGTH_FORMAT, header)
+                data = self.receive_exactly(client_socket, length).decode()
+                if data.startswith("[Error] > "):
+                    raise SocketCallException(data)
+                yield data
+        finally:
+            client_socket.close()
+
+    @staticmethod
+    def receive_exactly(client_socket, size):
+        received_data = bytearray()
+        while len(received_data) < size:
+            data_chunk = client_socket.recv(min(size - len(received_data), 65536))
+            if not data_chunk:
+                raise SocketCallException("connection closed by the service before the end of the response")
+            received_data += data_chunk
+        return bytes(received_data)
@@ -1,9 +1,19 @@
+import io
+import shlex
+import sys
 from abc import ABC, abstractmethod
 
+from fw_fanctrl.CommandParser import CommandParser
+from fw_fanctrl.dto.command_result.CommandResult import CommandResult
+from fw_fanctrl.dto.command_result.WatchCommandResult import WatchCommandResult
+from fw_fanctrl.enum.CommandStatus import CommandStatus
+from fw_fanctrl.enum.OutputFormat import OutputFormat
 from fw_fanctrl.exception.UnimplementedException import UnimplementedException
 
 
 class SocketController(ABC):
+    command_parser = None
+
     @abstractmethod
     def start_server_socket(self, command_callback=None):
         raise UnimplementedException()
@@ -19,3 +29,43 @@ class SocketController(ABC):
     @abstractmethod
     def send_via_client_socket(self, command):
         raise UnimplementedException()
+
+    # yields the response messages as they are received, for streaming commands (e.g. watch)
+    @abstractmethod
+    def stream_via_client_socket(self, command):
+        raise UnimplementedException()
+
+    # the parser is built once and reused for every request, as building it costs more than the parsing itself
+    def get_command_parser(self):
+        if self.command_parser is None:
+            self.command_parser = CommandParser(True)
+        return self.command_parser
+
+    # parses and executes a command received by the server socket, returning the response to send back to the client,
+    # or the WatchCommandResult to stream to it
+    def execute_command(self, data, command_callback):
+        parse_print_capture = io.StringIO()
+        args = None
+        try:
+            # capture parsing outputs for the client, without touching the process-wide std outputs
+            args = self.get_command_parser().parse_args(shlex.split(data), output=parse_print_capture)
+            command_result = command_callback(args)
+            if isinstance(command_result, WatchCommandResult):
+                return command_result
+
+            if args.output_format == OutputFormat.JSON:
+                if parse_print_capture.getvalue().strip():
+                    command_result.info = parse_print_capture.getvalue()
+                return command_result.to_output_format(args.output_format)
+            natural_result = command_result.to_output_format(args.output_format)
+            if parse_print_capture.getvalue().strip():
+                natural_result = parse_print_capture.getvalue() + natural_result
+            return natural_result
+        except (SystemExit, Exception) as e:
+            # argparse reports its errors (and help) through its output before exiting
+            reason = parse_print_capture.getvalue().strip() if args is None else ""
+            _cre = CommandResult(
+                CommandStatus.ERROR, f"An error occurred while treating a socket command: {reason or e}"
+            ).to_output_format(getattr(args, "output_format", None))
+            print(_cre, file=sys.stderr)
+            return _cre
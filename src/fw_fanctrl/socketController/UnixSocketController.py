@@ -1,13 +1,14 @@
-import io
+import codecs
 import os
-import shlex
+import select
 import socket
 import sys
+import threading
 from abc import ABC
 
-from fw_fanctrl import COMMANDS_SOCKET_FILE_PATH, SOCKETS_FOLDER_PATH
-from fw_fanctrl.CommandParser import CommandParser
+from fw_fanctrl import COMMANDS_SOCKET_FILE_PATH
 from fw_fanctrl.dto.command_result.CommandResult import CommandResult
+from fw_fanctrl.dto.command_result.WatchCommandResult import WatchCommandResult
 from fw_fanctrl.enum.CommandStatus import CommandStatus
 from fw_fanctrl.enum.OutputFormat import OutputFormat
 from fw_fanctrl.exception.SocketAlreadyRunningException import SocketAlreadyRunningException
@@ -17,74 +18,113 @@ from fw_fanctrl.socketController.SocketController import SocketController
 
 class UnixSocketController(SocketController, ABC):
     server_socket = None
+    socket_path = None
+    # the interval (in seconds) at which a watch stream with no record to send checks that its client is still there
+    watch_poll_interval = 1
+
+    def __init__(self, socket_path=COMMANDS_SOCKET_FILE_PATH):
+        self.socket_path = socket_path
 
     def start_server_socket(self, command_callback=None):
         if self.server_socket:
             raise SocketAlreadyRunningException(self.server_socket)
         self.server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        if os.path.exists(COMMANDS_SOCKET_FILE_PATH):
-            os.remove(COMMANDS_SOCKET_FILE_PATH)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
         try:
-            if not os.path.exists(SOCKETS_FOLDER_PATH):
-                os.makedirs(SOCKETS_FOLDER_PATH)
+            if not os.path.exists(os.path.dirname(self.socket_path)):
+                os.makedirs(os.path.dirname(self.socket_path))
             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.server_socket.bind(COMMANDS_SOCKET_FILE_PATH)
-            os.chmod(COMMANDS_SOCKET_FILE_PATH, 0o777)
+            self.server_socket.bind(self.socket_path)
+            os.chmod(self.socket_path, 0o777)
             self.server_socket.listen(1)
+            server_socket = self.server_socket
             while True:
-                client_socket, _ = self.server_socket.accept()
-                parse_print_capture = io.StringIO()
-                args = None
+                try:
+                    client_socket, _ = server_socket.accept()
+                except OSError:
+                    # closed by stop_server_socket
+                    break
                 try:
                     # Receive data from the client
                     data = client_socket.recv(4096).decode()
-                    original_stderr = sys.stderr
-                    original_stdout = sys.stdout
-                    # capture parsing std outputs for the client
-                    sys.stderr = parse_print_capture
-                    sys.stdout = parse_print_capture
-
-                    try:
-                        args = CommandParser(True).parse_args(shlex.split(data))
-                    finally:
-                        sys.stderr = original_stderr
-                        sys.stdout = original_stdout
-
-                        command_result = command_callback(args)
-
-                        if args.output_format == OutputFormat.JSON:
-                            if parse_print_capture.getvalue().strip():
-                                command_result.info = parse_print_capture.getvalue()
-                            client_socket.sendall(command_result.to_output_format(args.output_format).encode("utf-8"))
-                        else:
-                            natural_result = command_result.to_output_format(args.output_format)
-                            if parse_print_capture.getvalue().strip():
-                                natural_result = parse_print_capture.getvalue() + natural_result
-                            client_socket.sendall(natural_result.encode("utf-8"))
-                except (SystemExit, Exception) as e:
-                    _cre = CommandResult(
-                        CommandStatus.ERROR, f"An error occurred while treating a socket command: {e}"
-                    ).to_output_format(getattr(args, "output_format", None))
-                    print(_cre, file=sys.stderr)
-                    client_socket.sendall(_cre.encode("utf-8"))
+                    response = self.execute_command(data, command_callback)
+                    if isinstance(response, WatchCommandResult):
+                        # streamed from its own thread, so that the other clients are still served
+                        t = threading.Thread(target=self.stream_to_client_socket, args=[client_socket, response])
+                        t.daemon = True
+                        t.start()
+                        client_socket = None
+                        continue
+                    client_socket.sendall(response.encode("utf-8"))
+                except OSError as e:
+                    _cre = CommandResult(CommandStatus.ERROR, f"An error occurred while treating a socket command: {e}")
+                    print(_cre.to_output_format(OutputFormat.NATURAL), file=sys.stderr)
                 finally:
-                    client_socket.shutdown(socket.SHUT_WR)
-                    client_socket.close()
+                    if client_socket:
+                        client_socket.shutdown(socket.SHUT_WR)
+                        client_socket.close()
         finally:
             self.stop_server_socket()
 
+    @staticmethod
+    def is_client_connected(client_socket):
+        try:
+            readable, _, _ = select.select([client_socket], [], [], 0)
+            # the client sends nothing more, a readable socket with no data left means it went away
+            return not readable or client_socket.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) != b""
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+
+    def stream_to_client_socket(self, client_socket, watch_result):
+        records = watch_result.stream(self.watch_poll_interval, lambda: self.is_client_connected(client_socket))
+        try:
+            for record in records:
+                client_socket.sendall(record.encode("utf-8"))
+        except OSError:
+            # the client went away
+            pass
+        finally:
+            records.close()
+            client_socket.close()
+
     def stop_server_socket(self):
         if self.server_socket:
+            # wakes the accept up, closing the socket alone does not
+            try:
+                self.server_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
             self.server_socket.close()
             self.server_socket = None
 
     def is_server_socket_running(self):
         return self.server_socket is not None
 
+    def stream_via_client_socket(self, command):
+        client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client_socket.connect(self.socket_path)
+            client_socket.sendall(command.encode("utf-8"))
+            # a multi-byte character may be split across two chunks
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            while True:
+                data_chunk = client_socket.recv(4096)
+                if not data_chunk:
+                    break
+                data = decoder.decode(data_chunk)
+                if data.startswith("[Error] > "):
+                    raise SocketCallException(data)
+                yield data
+        finally:
+            client_socket.close()
+
     def send_via_client_socket(self, command):
         client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
         try:
-            client_socket.connect(COMMANDS_SOCKET_FILE_PATH)
+            client_socket.connect(self.socket_path)
             client_socket.sendall(command.encode("utf-8"))
             received_data = b""
             while True: